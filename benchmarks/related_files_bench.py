@@ -0,0 +1,127 @@
+"""Benchmark related-file grouping on synthetic file names.
+
+Runs RelatedFileIndex over growing sets of reproducible synthetic paths,
+checks that it produces exactly the groups of the original quadratic loop
+on a prefix small enough for that loop, and prints the results as JSON.
+
+    python benchmarks/related_files_bench.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from related_files import RelatedFileIndex  # noqa: E402
+
+WORDS = [
+    'user', 'account', 'order', 'invoice', 'report', 'config', 'settings', 'utils',
+    'helper', 'model', 'view', 'controller', 'service', 'client', 'server', 'cache',
+    'index', 'main', 'app', 'router', 'schema', 'parser', 'loader', 'writer',
+    'image', 'thumb', 'backup', 'export', 'import', 'data', 'log', 'event',
+]
+SUFFIXES = ['', '_test', '_spec', '.min', '_v2', '_old', '_backup', 's']
+EXTENSIONS = ['.py', '.js', '.ts', '.json', '.md', '.txt', '.png', '.csv', '.log']
+
+
+def synthetic_paths(count, seed=0):
+    """Reproducible synthetic paths mixing shared words, variants and unique ids."""
+    rng = random.Random(seed)
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            # Variants of common names: the bulk of real grouping work
+            stem = rng.choice(WORDS) + rng.choice(SUFFIXES)
+        elif roll < 0.8:
+            stem = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}_{rng.randrange(1000)}"
+        else:
+            # Unique names (hashes, ids) that each start a new group
+            stem = f"{rng.getrandbits(40):010x}"
+        directory = f"dir{rng.randrange(100)}/sub{rng.randrange(20)}"
+        yield f"/data/{directory}/{stem}{rng.choice(EXTENSIONS)}"
+
+
+def group_with_index(paths):
+    """Group paths the way FolderAnalyzer.group_related_files does."""
+    index = RelatedFileIndex()
+    groups = {}
+    for path in paths:
+        stem = Path(path).stem
+        head = index.find(stem)
+        if head is not None:
+            groups[head].append(path)
+        else:
+            groups[path] = []
+            index.add(path, stem)
+    return groups
+
+
+def group_naive(paths):
+    """The original O(n^2) grouping loop, used as the reference."""
+    groups = {}
+    for path in paths:
+        stem = Path(path).stem
+        for existing_path in groups:
+            existing_stem = Path(existing_path).stem
+            if (stem in existing_stem or existing_stem in stem) and len(stem) > 3:
+                groups[existing_path].append(path)
+                break
+        else:
+            groups[path] = []
+    return groups
+
+
+def run(sizes, verify, seed):
+    results = {'seed': seed, 'runs': []}
+
+    if verify:
+        paths = list(synthetic_paths(verify, seed))
+        start = time.perf_counter()
+        expected = group_naive(paths)
+        naive_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        actual = group_with_index(paths)
+        index_seconds = time.perf_counter() - start
+        results['verification'] = {
+            'files': verify,
+            'equivalent': actual == expected,
+            'naive_seconds': round(naive_seconds, 4),
+            'index_seconds': round(index_seconds, 4)
+        }
+
+    for size in sizes:
+        paths = list(synthetic_paths(size, seed))
+        start = time.perf_counter()
+        groups = group_with_index(paths)
+        seconds = time.perf_counter() - start
+        results['runs'].append({
+            'files': size,
+            'groups': len(groups),
+            'seconds': round(seconds, 4),
+            'files_per_sec': round(size / seconds) if seconds else None
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                        help='Numbers of synthetic file names to group')
+    parser.add_argument('--verify', type=int, default=5000,
+                        help='Files to check against the original algorithm (0 to skip)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.verify, args.seed)
+    print(json.dumps(results, indent=2))
+    if 'verification' in results and not results['verification']['equivalent']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
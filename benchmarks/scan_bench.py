@@ -0,0 +1,185 @@
+"""Benchmark FolderAnalyzer.scan on a reproducible synthetic tree.
+
+Generates a folder tree with a configurable number of files, nesting depth,
+size distribution and content mix (Python, JavaScript, docs, JSON, binary
+and non-UTF-8 text), scans it, and prints throughput, peak RSS and the time
+spent in each scan stage as JSON so runs can be compared.
+
+    python benchmarks/scan_bench.py --files 20000 --depth 8 --output run.json
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from folder_analyzer import FolderAnalyzer  # noqa: E402
+
+# Share of generated files per kind
+CONTENT_MIX = {
+    'python': 0.30,
+    'javascript': 0.20,
+    'doc': 0.20,
+    'binary': 0.15,
+    'json': 0.10,
+    'latin1': 0.05,
+}
+EXTENSIONS = {
+    'python': '.py',
+    'javascript': '.js',
+    'doc': '.md',
+    'binary': '.bin',
+    'json': '.json',
+    'latin1': '.txt',
+}
+MODULES = ['os', 'sys', 'json', 're', 'numpy', 'requests', 'flask', 'collections', 'typing', 'pathlib']
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do']
+
+
+def file_content(kind, size, rng):
+    """Build roughly size bytes of content of the given kind."""
+    if kind == 'binary':
+        return rng.randbytes(size)
+
+    if kind == 'python':
+        header = ''.join(f"import {rng.choice(MODULES)}\n" for _ in range(rng.randrange(1, 8)))
+        body = "def f{0}(x):\n    return x * {0}\n\n"
+    elif kind == 'javascript':
+        header = ''.join(f"const m{i} = require('{rng.choice(MODULES)}');\n" for i in range(rng.randrange(1, 8)))
+        body = "function f{0}(x) {{ return x * {0}; }}\n"
+    elif kind == 'json':
+        header = '{"items": [\n'
+        body = '  {{"id": {0}, "name": "item{0}"}},\n'
+    elif kind == 'latin1':
+        header = 'Café crème brûlée\n'
+        body = 'Ligne {0}: déjà vu, à la carte, naïve façade\n'
+    else:
+        header = '# Document\n\n'
+        body = ' '.join(WORDS) + ' {0}\n'
+
+    parts = [header]
+    length = len(header)
+    i = 0
+    while length < size:
+        line = body.format(i)
+        parts.append(line)
+        length += len(line)
+        i += 1
+    text = ''.join(parts)
+    return text.encode('latin-1' if kind == 'latin1' else 'utf-8')
+
+
+def generate_tree(root, files, depth, median_size, max_size, seed):
+    """Write a synthetic tree under root and return a summary of it."""
+    rng = random.Random(seed)
+    kinds = list(CONTENT_MIX)
+    weights = [CONTENT_MIX[kind] for kind in kinds]
+
+    # One chain at full depth guarantees deep nesting; other directories
+    # get random depths up to the maximum
+    directories = [os.path.join(*[f"deep{level}" for level in range(depth)])] if depth else ['']
+    for i in range(max(1, files // 50)):
+        levels = rng.randrange(depth + 1)
+        directories.append(os.path.join(*[f"d{rng.randrange(10)}" for _ in range(levels)], f"dir{i}") if levels else f"dir{i}")
+
+    total_bytes = 0
+    counts = dict.fromkeys(kinds, 0)
+    for i in range(files):
+        kind = rng.choices(kinds, weights)[0]
+        size = min(max_size, int(rng.lognormvariate(0, 1.2) * median_size))
+        directory = os.path.join(root, rng.choice(directories))
+        os.makedirs(directory, exist_ok=True)
+        content = file_content(kind, size, rng)
+        with open(os.path.join(directory, f"file{i}{EXTENSIONS[kind]}"), 'wb') as f:
+            f.write(content)
+        total_bytes += len(content)
+        counts[kind] += 1
+
+    return {'files': files, 'bytes': total_bytes, 'directories': len(directories), 'kinds': counts}
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process and its children, in KB."""
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and KB elsewhere
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def run_scan(root, args):
+    analyzer = FolderAnalyzer(
+        root,
+        workers=args.workers,
+        backend=args.backend,
+        classify_mode=args.classify_mode,
+        metadata_only=args.metadata_only
+    )
+    start = time.perf_counter()
+    analyzer.scan()
+    seconds = time.perf_counter() - start
+
+    metrics = analyzer.stats['metrics']
+
+    return {
+        'seconds': round(seconds, 4),
+        'files': analyzer.stats['total_files'],
+        'bytes': analyzer.stats['total_size'],
+        'files_per_sec': round(analyzer.stats['total_files'] / seconds, 1) if seconds else None,
+        'bytes_per_sec': round(analyzer.stats['total_size'] / seconds) if seconds else None,
+        'peak_rss_kb': peak_rss_kb(),
+        # Stage times are summed across workers, so with a pool they can exceed wall time
+        'stages': {stage: round(timing['total'], 4) for stage, timing in sorted(metrics['stages'].items())},
+        'io': metrics['counters'],
+        'slowest_files': metrics['slowest_files'][:5],
+        'warnings': len(analyzer.stats['progress']['warnings'])
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, default=5000, help='Number of files to generate')
+    parser.add_argument('--depth', type=int, default=6, help='Maximum directory nesting depth')
+    parser.add_argument('--median-size', type=int, default=4096, help='Median file size in bytes')
+    parser.add_argument('--max-size', type=int, default=4 * 1024 * 1024, help='Largest file size in bytes')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--tree', help='Reuse (or create and keep) the synthetic tree at this path')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--backend', choices=FolderAnalyzer.WORKER_BACKENDS, default='thread')
+    parser.add_argument('--classify-mode', choices=('fast', 'accurate'), default='fast')
+    parser.add_argument('--metadata-only', action='store_true')
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout')
+    args = parser.parse_args()
+
+    root = args.tree or tempfile.mkdtemp(prefix='folder_analyzer_bench_')
+    try:
+        start = time.perf_counter()
+        if args.tree and os.path.isdir(root) and os.listdir(root):
+            tree = {'reused': True}
+        else:
+            tree = generate_tree(root, args.files, args.depth, args.median_size, args.max_size, args.seed)
+            tree['generate_seconds'] = round(time.perf_counter() - start, 4)
+
+        report = {
+            'config': {key: value for key, value in vars(args).items() if key not in ('output', 'tree')},
+            'tree': tree,
+            'scan': run_scan(root, args)
+        }
+    finally:
+        if not args.tree:
+            shutil.rmtree(root, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
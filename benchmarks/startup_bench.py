@@ -0,0 +1,105 @@
+"""Benchmark how long the analyzer takes to start.
+
+Runs each command in a fresh interpreter several times and prints the
+median, fastest and slowest wall time as JSON: a bare interpreter for
+reference, importing folder_analyzer and web_app, and a metadata-only CLI
+run on a small generated folder. The slowest top-level imports of
+folder_analyzer (from python -X importtime) are listed too.
+
+    python benchmarks/startup_bench.py --runs 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def small_tree(root, files):
+    """A flat-ish folder of small text files."""
+    for i in range(files):
+        directory = os.path.join(root, f"dir{i % 5}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.py" if i % 2 else f"file{i}.txt"), 'w') as f:
+            f.write(f"import os\nvalue = {i}\n")
+
+
+def time_command(command, runs, env, cwd):
+    """Wall-clock seconds of a command over several runs."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env, cwd=cwd, check=True)
+        timings.append(time.perf_counter() - start)
+    return {
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'min_ms': round(min(timings) * 1000, 2),
+        'max_ms': round(max(timings) * 1000, 2)
+    }
+
+
+def slowest_imports(module, env, limit):
+    """Top-level imports of a module by cumulative import time."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, env=env, check=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package", indented by nesting
+        fields = line.split('|')
+        if len(fields) != 3 or not fields[2].startswith('   ') or fields[2].startswith('    '):
+            continue
+        try:
+            imports.append({'module': fields[2].strip(), 'cumulative_ms': int(fields[1]) / 1000})
+        except ValueError:
+            continue
+    imports.sort(key=lambda entry: entry['cumulative_ms'], reverse=True)
+    return imports[:limit]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10, help='Runs per command')
+    parser.add_argument('--files', type=int, default=50, help='Files in the folder scanned by the CLI run')
+    parser.add_argument('--top-imports', type=int, default=10, help='Slowest imports listed')
+    parser.add_argument('--output', help='Write the JSON report to this file as well as stdout')
+    args = parser.parse_args()
+
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    # Warm the bytecode cache so the runs measure loading, not compiling
+    subprocess.run([sys.executable, '-m', 'compileall', '-q', ROOT], stdout=subprocess.DEVNULL, env=env)
+
+    # Commands run in a scratch directory: importing web_app touches its
+    # working directory (stored results and snapshots)
+    scratch = tempfile.mkdtemp(prefix='folder_analyzer_startup_')
+    tree = os.path.join(scratch, 'tree')
+    try:
+        small_tree(tree, args.files)
+        commands = {
+            'interpreter': [sys.executable, '-c', 'pass'],
+            'import_folder_analyzer': [sys.executable, '-c', 'import folder_analyzer'],
+            'import_web_app': [sys.executable, '-c', 'import web_app'],
+            'cli_metadata_only': [sys.executable, '-m', 'folder_analyzer', tree, '--metadata-only', '--json'],
+        }
+        report = {
+            'config': {'runs': args.runs, 'files': args.files, 'python': sys.version.split()[0]},
+            'commands': {name: time_command(command, args.runs, env, scratch) for name, command in commands.items()},
+            'slowest_imports': slowest_imports('folder_analyzer', env, args.top_imports)
+        }
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+
+
+if __name__ == '__main__':
+    main()
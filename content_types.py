@@ -0,0 +1,212 @@
+import mimetypes
+import threading
+
+# chardet and libmagic are imported on first use: together they take longer
+# to load than a metadata-only scan of a small folder takes to run
+
+# Well-known extensions, checked before any file content is read
+EXTENSION_TYPES = {
+    '.py': 'text/x-python',
+    '.pyi': 'text/x-python',
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.cjs': 'text/javascript',
+    '.jsx': 'text/javascript',
+    '.ts': 'text/x-typescript',
+    '.tsx': 'text/x-typescript',
+    '.java': 'text/x-java',
+    '.c': 'text/x-c',
+    '.h': 'text/x-c',
+    '.cpp': 'text/x-c++',
+    '.cc': 'text/x-c++',
+    '.cxx': 'text/x-c++',
+    '.hpp': 'text/x-c++',
+    '.go': 'text/x-go',
+    '.rs': 'text/x-rust',
+    '.rb': 'text/x-ruby',
+    '.php': 'text/x-php',
+    '.sh': 'text/x-shellscript',
+    '.html': 'text/html',
+    '.htm': 'text/html',
+    '.css': 'text/css',
+    '.md': 'text/markdown',
+    '.rst': 'text/x-rst',
+    '.txt': 'text/plain',
+    '.csv': 'text/csv',
+    '.json': 'application/json',
+    '.xml': 'text/xml',
+    '.yaml': 'application/x-yaml',
+    '.yml': 'application/x-yaml',
+    '.toml': 'application/toml',
+    '.ini': 'text/plain',
+    '.cfg': 'text/plain',
+    '.svg': 'image/svg+xml',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.gif': 'image/gif',
+    '.webp': 'image/webp',
+    '.ico': 'image/vnd.microsoft.icon',
+    '.pdf': 'application/pdf',
+    '.zip': 'application/zip',
+    '.gz': 'application/gzip',
+    '.tgz': 'application/gzip',
+    '.bz2': 'application/x-bzip2',
+    '.xz': 'application/x-xz',
+    '.7z': 'application/x-7z-compressed',
+    '.tar': 'application/x-tar',
+    '.jar': 'application/java-archive',
+    '.whl': 'application/zip',
+    '.class': 'application/x-java-applet',
+    '.pyc': 'application/x-bytecode.python',
+    '.so': 'application/x-sharedlib',
+    '.dll': 'application/x-dosexec',
+    '.exe': 'application/x-dosexec',
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/x-wav',
+    '.mp4': 'video/mp4',
+    '.mov': 'video/quicktime',
+    '.sqlite': 'application/vnd.sqlite3',
+    '.db': 'application/vnd.sqlite3',
+}
+
+# Extension-less files recognised by name
+FILENAME_TYPES = {
+    'Makefile': 'text/x-makefile',
+    'Dockerfile': 'text/plain',
+    'LICENSE': 'text/plain',
+    'README': 'text/plain',
+    'Procfile': 'text/plain',
+    '.gitignore': 'text/plain',
+    '.dockerignore': 'text/plain',
+    '.editorconfig': 'text/plain',
+}
+
+# Magic numbers for common binary formats
+HEADER_SIGNATURES = [
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'%PDF-', 'application/pdf'),
+    (b'PK\x03\x04', 'application/zip'),
+    (b'\x1f\x8b', 'application/gzip'),
+    (b'BZh', 'application/x-bzip2'),
+    (b'\xfd7zXZ\x00', 'application/x-xz'),
+    (b"7z\xbc\xaf'\x1c", 'application/x-7z-compressed'),
+    (b'\x7fELF', 'application/x-executable'),
+    (b'MZ', 'application/x-dosexec'),
+    (b'\xca\xfe\xba\xbe', 'application/x-java-applet'),
+    (b'SQLite format 3\x00', 'application/vnd.sqlite3'),
+    (b'OggS', 'audio/ogg'),
+    (b'ID3', 'audio/mpeg'),
+]
+
+# Non-text/ types whose content is text, so it is worth analyzing
+TEXT_APPLICATION_TYPES = {'application/json', 'application/x-yaml', 'application/toml', 'application/xml',
+                          'application/javascript', 'image/svg+xml'}
+
+# Types known to be binary, from the extension and header tiers: their
+# content is never read for encoding detection or line counts
+BINARY_TYPES = {
+    mime_type
+    for mime_type in {mime_type for _, mime_type in HEADER_SIGNATURES} | set(EXTENSION_TYPES.values())
+    if not mime_type.startswith('text/') and mime_type not in TEXT_APPLICATION_TYPES
+} | {'application/octet-stream'}
+
+# Byte order marks of UTF-16/32 text, which is full of NUL bytes
+WIDE_BOMS = (b'\xff\xfe', b'\xfe\xff', b'\x00\x00\xfe\xff')
+
+
+class ContentClassifier:
+    """Tiered MIME type and encoding detection.
+
+    In 'fast' mode the cheapest tier that gives an answer wins: the
+    filename/extension table, then a check of the first few KB against
+    known magic numbers and for plain UTF-8 text, and only then libmagic.
+    'accurate' mode always asks libmagic first, as the analyzer used to.
+    Every result reports the tier that produced it.
+    """
+
+    MODES = ('fast', 'accurate')
+    HEADER_BYTES = 4096  # Bytes sniffed by the header tier
+    CHARDET_SAMPLE_BYTES = 64 * 1024  # Prefix handed to chardet in fast mode
+    ACCURATE_CHARDET_BYTES = 1024 * 1024  # Prefix handed to chardet in accurate mode
+
+    def __init__(self, mode='fast'):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown classifier mode: {mode}")
+        self.mode = mode
+        # libmagic handles are not thread-safe, so each thread gets its own
+        self._local = threading.local()
+
+    @property
+    def magic(self):
+        """Per-thread libmagic instance."""
+        handle = getattr(self._local, 'magic', None)
+        if handle is None:
+            import magic
+            handle = self._local.magic = magic.Magic(mime=True)
+        return handle
+
+    def classify(self, file_path, counters=None):
+        """Return (mime_type, tier) for a file; I/O is tallied into counters if given."""
+        if counters is None:
+            counters = {}
+
+        if self.mode == 'fast':
+            mime_type = FILENAME_TYPES.get(file_path.name) or EXTENSION_TYPES.get(file_path.suffix.lower())
+            if mime_type:
+                return mime_type, 'extension'
+
+            try:
+                with open(file_path, 'rb') as f:
+                    header = f.read(self.HEADER_BYTES)
+                counters['files_opened'] = counters.get('files_opened', 0) + 1
+                counters['bytes_read'] = counters.get('bytes_read', 0) + len(header)
+            except OSError:
+                header = None
+            if header is not None:
+                mime_type = self.sniff_header(header)
+                if mime_type:
+                    return mime_type, 'header'
+
+        try:
+            counters['libmagic_calls'] = counters.get('libmagic_calls', 0) + 1
+            return self.magic.from_file(str(file_path)), 'libmagic'
+        except Exception:
+            return mimetypes.guess_type(str(file_path))[0] or 'unknown', 'mimetypes'
+
+    def sniff_header(self, header):
+        """Classify the first bytes of a file, or return None if unsure."""
+        if not header:
+            return 'inode/x-empty'
+        for signature, mime_type in HEADER_SIGNATURES:
+            if header.startswith(signature):
+                return mime_type
+        if b'\x00' not in header and self.is_utf8(header):
+            return 'text/plain'
+        return None
+
+    def looks_binary(self, head):
+        """True if the start of a file has a NUL byte and isn't UTF-16/32 text."""
+        return b'\x00' in head[:self.HEADER_BYTES] and not head.startswith(WIDE_BOMS)
+
+    def is_utf8(self, data):
+        """Check whether data is valid UTF-8, allowing a character cut off at the end."""
+        try:
+            data.decode('utf-8')
+            return True
+        except UnicodeDecodeError as e:
+            return e.reason == 'unexpected end of data' and e.start >= len(data) - 3
+
+    def detect_encoding(self, raw_data):
+        """Return (encoding, tier) for a prefix of a file's content."""
+        if self.mode == 'fast':
+            if self.is_utf8(raw_data):
+                return 'utf-8', 'utf-8'
+            sample = raw_data[:self.CHARDET_SAMPLE_BYTES]
+        else:
+            sample = raw_data[:self.ACCURATE_CHARDET_BYTES]
+        import chardet
+        return chardet.detect(sample)['encoding'] or 'utf-8', 'chardet'
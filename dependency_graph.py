@@ -0,0 +1,430 @@
+import os
+from array import array
+from bisect import bisect_left
+
+PYTHON_SUFFIXES = ('.py', '.pyi', '.pyw')
+JS_SUFFIXES = ('.js', '.ts', '.tsx', '.jsx', '.mjs', '.cjs')
+C_SUFFIXES = ('.c', '.h', '.cc', '.cpp', '.cxx', '.hh', '.hpp', '.hxx')
+
+
+class DependencyGraph:
+    """Import graph of a scanned tree.
+
+    While files are merged, each (file, imported module) pair is appended to
+    two parallel arrays, with files referenced by their record index and
+    module names interned. build() resolves imports that refer to files in
+    the tree (Python absolute and relative modules, relative JS/TS paths,
+    C/C++ includes and Java classes), then packs the edges into sorted
+    offset/target arrays in both directions. Nodes are record indices for
+    in-tree files and len(records) + module id for external modules.
+
+    Importer lookups, fan-in/fan-out rankings and strongly connected
+    components are all answered from these arrays and orderings computed
+    once by build(), without touching the files again. In watch mode a
+    changed file's edges are dropped with discard() and added again, and
+    each rebuild works on a copy().
+    """
+
+    def __init__(self):
+        self.modules = []  # Interned module names
+        self._module_ids = {}
+        self._edge_files = array('I')
+        self._edge_modules = array('I')
+        self.built = False
+
+    def add(self, file_index, dependencies):
+        """Record the modules imported by one file."""
+        for name in dependencies:
+            module_id = self._module_ids.get(name)
+            if module_id is None:
+                module_id = self._module_ids[name] = len(self.modules)
+                self.modules.append(name)
+            self._edge_files.append(file_index)
+            self._edge_modules.append(module_id)
+
+    def discard(self, file_indices):
+        """Forget the imports of some files; returns file index -> the module names dropped."""
+        removed = {}
+        files = array('I')
+        modules = array('I')
+        for file_index, module_id in zip(self._edge_files, self._edge_modules):
+            if file_index in file_indices:
+                removed.setdefault(file_index, []).append(self.modules[module_id])
+            else:
+                files.append(file_index)
+                modules.append(module_id)
+        self._edge_files, self._edge_modules = files, modules
+        self.built = False
+        return removed
+
+    def module_counts(self):
+        """Number of files importing each module name."""
+        counts = {}
+        for module_id in self._edge_modules:
+            name = self.modules[module_id]
+            counts[name] = counts.get(name, 0) + 1
+        return counts
+
+    def copy(self):
+        """An unbuilt graph of the same imports, without modules no file imports any more."""
+        graph = DependencyGraph()
+        used = sorted(set(self._edge_modules))
+        new_ids = {module_id: new_id for new_id, module_id in enumerate(used)}
+        graph.modules = [self.modules[module_id] for module_id in used]
+        graph._module_ids = {name: module_id for module_id, name in enumerate(graph.modules)}
+        graph._edge_files = array('I', self._edge_files)
+        graph._edge_modules = array('I', [new_ids[module_id] for module_id in self._edge_modules])
+        return graph
+
+    def build(self, records):
+        """Resolve in-tree imports and index the graph for queries."""
+        self.records = records
+        self.file_count = len(records)
+        node_count = self.file_count + len(self.modules)
+        self._paths = {records.path(index): index for index in records.live()}
+        self._resolver = _Resolver(records, self._paths)
+        self._resolved_modules = {}  # Module id -> file, for absolute imports that resolved
+
+        # One integer key per distinct (file, target) pair: sorting the keys
+        # orders edges by file and then target, and drops duplicates
+        keys = set()
+        last_file = None
+        for file_index, module_id in zip(self._edge_files, self._edge_modules):
+            if file_index != last_file:
+                # A file's edges are added together
+                last_file = file_index
+                kind = _kind(records.names[file_index])
+                directory = records.dirs[records.dir_ids[file_index]]
+            name = self.modules[module_id]
+            resolved = self._resolver.resolve(directory, kind, name) if kind else None
+            if resolved is None:
+                target = self.file_count + module_id
+            else:
+                target = resolved
+                if not name.startswith('.'):
+                    self._resolved_modules[module_id] = resolved
+            if target != file_index:
+                keys.add(file_index * node_count + target)
+
+        edges = sorted(keys)
+        keys = None
+        self.edge_count = len(edges)
+
+        # Forward adjacency: file -> targets. Keys are sorted by file, so a
+        # file's edges start where bisect finds its first key
+        self._out_targets = array('I', [key % node_count for key in edges])
+        self._out_offsets = array('I', [bisect_left(edges, index * node_count) for index in range(self.file_count + 1)])
+
+        # Reverse adjacency: target -> importing files, from the same pairs keyed by target
+        edges = sorted([key % node_count * node_count + key // node_count for key in edges])
+        self._in_sources = array('I', [key % node_count for key in edges])
+        self._in_offsets = array('I', [bisect_left(edges, node * node_count) for node in range(node_count + 1)])
+        edges = None
+
+        # Rankings are sorted once so queries only slice them; ties keep node order
+        fan_in = [self.fan_in(node) for node in range(node_count)]
+        self._fan_in_order = sorted((node for node in range(node_count) if fan_in[node]),
+                                    key=fan_in.__getitem__, reverse=True)
+        fan_out = [self.fan_out(node) for node in range(self.file_count)]
+        self._fan_out_order = sorted((node for node in range(self.file_count) if fan_out[node]),
+                                     key=fan_out.__getitem__, reverse=True)
+        self._components = self._strongly_connected_components()
+        self.in_tree_edges = sum(1 for target in self._out_targets if target < self.file_count)
+        self.built = True
+
+    def fan_in(self, node):
+        """Number of files importing a node."""
+        return self._in_offsets[node + 1] - self._in_offsets[node]
+
+    def fan_out(self, node):
+        """Number of distinct modules and files a file imports."""
+        return self._out_offsets[node + 1] - self._out_offsets[node]
+
+    def node_name(self, node):
+        """Relative path of an in-tree file, or an external module name."""
+        if node < self.file_count:
+            return self.records.path(node)
+        return self.modules[node - self.file_count]
+
+    def find(self, name):
+        """Node for a relative file path or a module name, or None."""
+        index = self._paths.get(os.path.normpath(name)) if name else None
+        if index is not None:
+            return index
+        module_id = self._module_ids.get(name)
+        if module_id is None:
+            return None
+        resolved = self._resolved_modules.get(module_id)
+        return resolved if resolved is not None else self.file_count + module_id
+
+    def importers(self, node):
+        """Paths of the files that import a node."""
+        start, end = self._in_offsets[node], self._in_offsets[node + 1]
+        return [self.records.path(index) for index in self._in_sources[start:end]]
+
+    def imports(self, node):
+        """What a file imports: in-tree files first, then external modules."""
+        if node >= self.file_count:
+            return []
+        start, end = self._out_offsets[node], self._out_offsets[node + 1]
+        return [
+            {'name': self.node_name(target), 'in_tree': target < self.file_count}
+            for target in self._out_targets[start:end]
+        ]
+
+    def top_fan_in(self, limit):
+        """Most imported files and modules."""
+        return [
+            {'name': self.node_name(node), 'in_tree': node < self.file_count, 'importers': self.fan_in(node)}
+            for node in self._fan_in_order[:limit]
+        ]
+
+    def top_fan_out(self, limit):
+        """Files importing the most distinct modules."""
+        return [
+            {'name': self.node_name(node), 'imports': self.fan_out(node)}
+            for node in self._fan_out_order[:limit]
+        ]
+
+    def cycles(self, limit=None):
+        """Import cycles (strongly connected components of files), largest first."""
+        components = self._components if limit is None else self._components[:limit]
+        return [sorted(self.records.path(index) for index in component) for component in components]
+
+    def summary(self, limit=10):
+        """Counts plus the top rankings, for results output."""
+        return {
+            'files_with_imports': len(self._fan_out_order),
+            'modules': len(self.modules),
+            'edges': self.edge_count,
+            'in_tree_edges': self.in_tree_edges,
+            'cycles': len(self._components),
+            'top_fan_in': self.top_fan_in(limit),
+            'top_fan_out': self.top_fan_out(limit)
+        }
+
+    def _strongly_connected_components(self):
+        """Iterative Tarjan over the file -> file edges; returns components of 2+ files."""
+        file_count = self.file_count
+        offsets, targets = self._out_offsets, self._out_targets
+        order = array('l', [-1]) * file_count
+        low = array('l', [0]) * file_count
+        on_stack = bytearray(file_count)
+        stack = []
+        components = []
+        counter = 0
+
+        for root in range(file_count):
+            if order[root] != -1 or offsets[root] == offsets[root + 1]:
+                continue
+            order[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [(root, offsets[root])]
+
+            while work:
+                node, position = work[-1]
+                end = offsets[node + 1]
+                while position < end:
+                    target = targets[position]
+                    position += 1
+                    if target >= file_count:
+                        continue
+                    if order[target] == -1:
+                        # Descend; resume this node at the next edge afterwards
+                        work[-1] = (node, position)
+                        order[target] = low[target] = counter
+                        counter += 1
+                        stack.append(target)
+                        on_stack[target] = 1
+                        work.append((target, offsets[target]))
+                        break
+                    if on_stack[target] and order[target] < low[node]:
+                        low[node] = order[target]
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        if low[node] < low[parent]:
+                            low[parent] = low[node]
+                    if low[node] == order[node]:
+                        component = []
+                        while True:
+                            member = stack.pop()
+                            on_stack[member] = 0
+                            component.append(member)
+                            if member == node:
+                                break
+                        if len(component) > 1:
+                            components.append(component)
+
+        components.sort(key=lambda component: (-len(component), min(component)))
+        return components
+
+
+def _kind(name):
+    """Resolution rules that apply to a file name."""
+    suffix = os.path.splitext(name)[1].lower()
+    if suffix in PYTHON_SUFFIXES:
+        return 'python'
+    if suffix in JS_SUFFIXES:
+        return 'js'
+    if suffix in C_SUFFIXES:
+        return 'c'
+    if suffix == '.java':
+        return 'java'
+    return None
+
+
+class _Resolver:
+    """Maps import names to record indices of files in the scanned tree.
+
+    Results are cached by everything they depend on, so a module imported
+    from many files is only resolved once per directory (once per set of
+    search bases for absolute Python imports).
+    """
+
+    def __init__(self, records, paths):
+        self.records = records
+        self.paths = paths
+        self._cache = {}
+        self._python_bases = {}  # Directory -> search bases for absolute imports
+        self._python_packages = None
+        self._by_name = None
+
+    def resolve(self, directory, kind, name):
+        """Record index of the file an import refers to, or None."""
+        if kind == 'python' and not name.startswith('.'):
+            bases = self.python_bases(directory)
+            key = (kind, bases, name)
+        elif kind == 'java':
+            key = (kind, None, name)
+        else:
+            key = (kind, directory, name)
+        if key in self._cache:
+            return self._cache[key]
+
+        if kind == 'python':
+            if name.startswith('.'):
+                resolved = self._python_relative(directory, name)
+            else:
+                resolved = self._python_module(bases, name, allow_package=False)
+        elif kind == 'js':
+            resolved = self._js(directory, name) if name.startswith(('./', '../')) else None
+        elif kind == 'c':
+            resolved = self._c(directory, name)
+        elif kind == 'java':
+            resolved = self._java(name)
+        else:
+            resolved = None
+        self._cache[key] = resolved
+        return resolved
+
+    def _python_relative(self, directory, name):
+        level = len(name) - len(name.lstrip('.'))
+        base = directory
+        for _ in range(level - 1):
+            if not base:
+                return None
+            base = os.path.dirname(base)
+        return self._python_module((base,), name[level:], allow_package=True)
+
+    def python_bases(self, directory):
+        """Directories an absolute import from directory may resolve against.
+
+        These are the directories that could be on sys.path: the importer's
+        non-package ancestors (script directories, the tree root) and the
+        source roots holding top-level packages.
+        """
+        bases = self._python_bases.get(directory)
+        if bases is None:
+            packages, roots = self.python_packages()
+            bases = []
+            current = directory
+            while True:
+                if current not in packages:
+                    bases.append(current)
+                if not current:
+                    break
+                current = os.path.dirname(current)
+            bases += [root for root in roots if root not in bases]
+            bases = self._python_bases[directory] = tuple(bases)
+        return bases
+
+    def _python_module(self, bases, module, allow_package):
+        """First of base/a/b.py, base/a/b/__init__.py, then base/a.py, ... that exists."""
+        parts = module.split('.') if module else []
+        # 'from pkg import name' may name an attribute: fall back to the package
+        stop = -1 if allow_package else 0
+        for length in range(len(parts), stop, -1):
+            if length:
+                relative = os.sep.join(parts[:length])
+                suffixes = ('.py', '.pyi', os.sep + '__init__.py')
+            else:
+                relative = ''
+                suffixes = ('__init__.py',)
+            for base in bases:
+                stem = base + os.sep + relative if base else relative
+                for suffix in suffixes:
+                    index = self.paths.get(stem + suffix)
+                    if index is not None:
+                        return index
+        return None
+
+    def python_packages(self):
+        """Package directories, and the source roots holding top-level packages (e.g. src/)."""
+        if self._python_packages is None:
+            packages = {
+                self.records.dirs[self.records.dir_ids[index]]
+                for index, name in enumerate(self.records.names)
+                if name == '__init__.py' and index not in self.records.deleted
+            }
+            roots = sorted({
+                os.path.dirname(package) for package in packages
+                if package and os.path.dirname(package) not in packages
+            }, key=lambda root: (root.count(os.sep), root))
+            self._python_packages = (packages, roots)
+        return self._python_packages
+
+    def _js(self, directory, spec):
+        stem = os.path.normpath(os.path.join(directory, spec))
+        if stem.startswith('..'):
+            return None
+        candidates = [stem] + [stem + suffix for suffix in JS_SUFFIXES]
+        candidates += [os.path.join(stem, 'index' + suffix) for suffix in JS_SUFFIXES]
+        for candidate in candidates:
+            index = self.paths.get(candidate)
+            if index is not None:
+                return index
+        return None
+
+    def _c(self, directory, include):
+        local = os.path.normpath(os.path.join(directory, include))
+        index = self.paths.get(local)
+        if index is not None:
+            return index
+        return self._by_path_suffix(include)
+
+    def _java(self, name):
+        parts = name.split('.')
+        # Nested classes: com.x.Outer.Inner lives in com/x/Outer.java
+        while len(parts) > 1:
+            index = self._by_path_suffix(os.path.join(*parts) + '.java')
+            if index is not None:
+                return index
+            parts.pop()
+        return None
+
+    def _by_path_suffix(self, relative):
+        """First file whose path ends with the given relative path."""
+        if self._by_name is None:
+            self._by_name = {}
+            for index in self.records.live():
+                self._by_name.setdefault(self.records.names[index], []).append(index)
+        relative = os.path.normpath(relative)
+        for index in self._by_name.get(os.path.basename(relative), ()):
+            path = self.records.path(index)
+            if path == relative or path.endswith(os.sep + relative):
+                return index
+        return None
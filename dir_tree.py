@@ -0,0 +1,127 @@
+import os
+from array import array
+from datetime import datetime
+
+
+class DirectoryTree:
+    """Per-directory size rollup of a scan.
+
+    build() sums each directory's own files from the record store's columns,
+    adds the ancestors of every directory (so directories holding only
+    subdirectories appear too) and rolls totals up to the root in one
+    bottom-up pass that reaches every directory before its parent. Children
+    are sorted by cumulative size once, so serving one level of the tree
+    only reads the nodes it returns.
+    """
+
+    DEFAULT_LIMIT = 100  # Children returned per directory
+
+    def __init__(self):
+        self.paths = []  # Relative directory paths; the root is ''
+        self.built = False
+
+    def build(self, records):
+        """Aggregate size, file count and newest mtime per directory."""
+        self._ids = {}
+        self.paths = []
+        self._parents = array('l')
+
+        # Every directory holding files, plus all of its ancestors; directories
+        # whose files have all been removed (watch mode) are left out
+        self._node('')
+        used = {records.dir_ids[index] for index in records.live()} if records.deleted else None
+        dir_nodes = [
+            self._node(directory) if used is None or dir_id in used else -1
+            for dir_id, directory in enumerate(records.dirs)
+        ]
+
+        node_count = len(self.paths)
+        self.sizes = array('q', bytes(8 * node_count))
+        self.files = array('q', bytes(8 * node_count))
+        self.newest = array('q', bytes(8 * node_count))
+        self.own_sizes = array('q', bytes(8 * node_count))
+        self.own_files = array('q', bytes(8 * node_count))
+
+        rows = zip(records.dir_ids, records.sizes, records.mtimes)
+        if records.deleted:
+            rows = (row for index, row in enumerate(rows) if index not in records.deleted)
+        for dir_id, size, mtime in rows:
+            node = dir_nodes[dir_id]
+            self.own_sizes[node] += size
+            self.own_files[node] += 1
+            if mtime > self.newest[node]:
+                self.newest[node] = mtime
+        self.sizes[:] = self.own_sizes
+        self.files[:] = self.own_files
+
+        # Children always come after their parent in self.paths, so walking
+        # backwards visits every directory before its parent
+        for node in range(node_count - 1, 0, -1):
+            parent = self._parents[node]
+            self.sizes[parent] += self.sizes[node]
+            self.files[parent] += self.files[node]
+            if self.newest[node] > self.newest[parent]:
+                self.newest[parent] = self.newest[node]
+
+        self._children = [[] for _ in range(node_count)]
+        for node in range(1, node_count):
+            self._children[self._parents[node]].append(node)
+        for children in self._children:
+            if len(children) > 1:
+                children.sort(key=lambda node: (-self.sizes[node], self.paths[node]))
+        self.built = True
+
+    def _node(self, directory):
+        """Node id of a directory, creating it and any missing ancestors.
+
+        Walks up with a loop rather than recursion, so trees deeper than the
+        interpreter's recursion limit work too.
+        """
+        missing = []
+        node = self._ids.get(directory)
+        while node is None:
+            missing.append(directory)
+            if not directory:
+                node = -1
+                break
+            directory = os.path.dirname(directory)
+            node = self._ids.get(directory)
+
+        # Create the missing ones from the top down, so parents come first
+        for directory in reversed(missing):
+            parent = node
+            node = self._ids[directory] = len(self.paths)
+            self.paths.append(directory)
+            self._parents.append(parent)
+        return node
+
+    def __len__(self):
+        return len(self.paths)
+
+    def find(self, path):
+        """Node id of a relative directory path, or None."""
+        path = os.path.normpath(path) if path else ''
+        return self._ids.get('' if path == '.' else path)
+
+    def node(self, node, depth=1, limit=DEFAULT_LIMIT):
+        """A directory with its children down to depth levels, largest first.
+
+        Directories with more than limit children list the largest ones and
+        report how many were left out.
+        """
+        children = self._children[node]
+        result = {
+            'path': self.paths[node],
+            'name': os.path.basename(self.paths[node]),
+            'size': self.sizes[node],
+            'files': self.files[node],
+            'own_size': self.own_sizes[node],
+            'own_files': self.own_files[node],
+            'modified': (datetime.fromtimestamp(self.newest[node] / 1e9).strftime('%Y-%m-%d %H:%M:%S')
+                         if self.files[node] else None),
+            'subdirectories': len(children)
+        }
+        if depth > 0:
+            result['children'] = [self.node(child, depth - 1, limit) for child in children[:limit]]
+            result['more_children'] = max(0, len(children) - limit)
+        return result
@@ -0,0 +1,190 @@
+import hashlib
+import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from snapshots import hash_file
+
+
+class DuplicateFinder:
+    """Find files with identical content among a scan's records.
+
+    Candidates are narrowed in stages so that as little as possible is read:
+
+    1. group by size, using the stat data the scan already has; a file with
+       a unique size is never opened, and hard links to one file count once;
+    2. hash the first and last BLOCK_BYTES of each remaining file; files no
+       larger than two blocks are read whole here, which settles them;
+    3. fully hash only the files whose size and partial hash still collide.
+
+    Hashing runs on a thread pool (hashlib and file reads release the GIL).
+    Content hashes already computed during the scan are reused as-is. When
+    the token fires, ScanCancelled is raised and queued hashes are dropped.
+    """
+
+    BLOCK_BYTES = 64 * 1024  # Bytes hashed at each end of a file in the partial stage
+    CHUNK_BYTES = 1024 * 1024  # Read size for full hashes
+    MAX_GROUPS = 100  # Groups reported in detail, most wasted space first
+
+    def __init__(self, root_path, records, workers=4, token=None, metrics=None, min_size=1):
+        self.root_path = root_path
+        self.records = records
+        self.workers = max(1, workers)
+        self.token = token
+        self.metrics = metrics
+        self.min_size = min_size  # Empty files are all "identical" and waste nothing
+
+    def find(self):
+        """Run all stages and return a summary with the largest duplicate groups."""
+        sizes = self.records.sizes
+        live = self.records.live()
+        if self.records.deleted:
+            live = list(live)
+        counts = Counter(sizes[index] for index in live) if self.records.deleted else Counter(sizes)
+        candidates = [
+            index for index in live
+            if sizes[index] >= self.min_size and counts[sizes[index]] > 1
+        ]
+
+        # Hard links to one file always share a size, so they are all among
+        # the candidates. Only the first link stands in for the file: the
+        # others are reported apart, as deleting them would reclaim nothing
+        candidates, links = self._collapse_links(candidates)
+        counts = Counter(sizes[index] for index in candidates)
+        candidates = [index for index in candidates if counts[sizes[index]] > 1]
+        self._count('duplicate_size_candidates', len(candidates))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            try:
+                # Files hashed during the scan skip straight to the final grouping
+                known = [index for index in candidates if index in self.records.hashes]
+                unknown = [index for index in candidates if index not in self.records.hashes]
+
+                partial = self._hash_all(executor, unknown, self._partial_hash, 'duplicate_partial_hashes')
+                groups = self._group(unknown, lambda index: (sizes[index], partial.get(index)))
+
+                # Small files were read whole by the partial stage; the rest need a
+                # full hash, as do large files that may match one hashed by the scan
+                known_sizes = {sizes[index] for index in known}
+                full_candidates = sorted(
+                    {index for group in groups for index in group if sizes[index] > 2 * self.BLOCK_BYTES}
+                    | {index for index in unknown if sizes[index] > 2 * self.BLOCK_BYTES and sizes[index] in known_sizes}
+                )
+                full = self._hash_all(executor, full_candidates, self._full_hash, 'duplicate_full_hashes')
+            except BaseException:
+                # Hashes still queued are dropped rather than run to completion;
+                # running ones stop at their next chunk once the token fires
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+
+        # A partial hash of a small file covers all of it, so it equals the
+        # full hash (same algorithm) and compares with scan-time hashes
+        def content_key(index):
+            if index in self.records.hashes:
+                return sizes[index], self.records.hashes[index]
+            if sizes[index] > 2 * self.BLOCK_BYTES:
+                return sizes[index], full.get(index)
+            return sizes[index], partial.get(index)
+
+        settled = {index for group in groups for index in group} | set(full_candidates) | set(known)
+        duplicates = self._group(sorted(settled), content_key)
+
+        groups = [
+            {
+                'size': sizes[group[0]],
+                'count': len(group),
+                'wasted_bytes': sizes[group[0]] * (len(group) - 1),
+                'paths': [self.records.path(index) for index in group]
+            }
+            for group in duplicates
+        ]
+        groups.sort(key=lambda group: (-group['wasted_bytes'], group['paths'][0]))
+
+        linked = [
+            {
+                'size': sizes[first],
+                'count': len(others) + 1,
+                'paths': [self.records.path(index) for index in [first] + others]
+            }
+            for first, others in links.items()
+        ]
+        linked.sort(key=lambda group: (-group['size'], group['paths'][0]))
+        return {
+            'group_count': len(groups),
+            'duplicate_files': sum(group['count'] - 1 for group in groups),
+            'wasted_bytes': sum(group['wasted_bytes'] for group in groups),
+            'groups': groups[:self.MAX_GROUPS],
+            'hard_links': {
+                'group_count': len(linked),
+                'linked_files': sum(group['count'] - 1 for group in linked),
+                'groups': linked[:self.MAX_GROUPS]
+            }
+        }
+
+    def _collapse_links(self, indices):
+        """Split indices into one per file and {first link: other links} for hard-linked files."""
+        devices, inodes = self.records.devices, self.records.inodes
+        firsts = {}  # (device, inode) -> first index seen
+        kept = []
+        links = {}
+        for index in indices:
+            inode = inodes[index]
+            if not inode:  # Unknown, e.g. a record made without a stat
+                kept.append(index)
+                continue
+            first = firsts.setdefault((devices[index], inode), index)
+            if first == index:
+                kept.append(index)
+            else:
+                links.setdefault(first, []).append(index)
+        return kept, links
+
+    def _group(self, indices, key):
+        """Groups of two or more indices sharing a key; unreadable files (key None) are dropped."""
+        buckets = {}
+        for index in indices:
+            value = key(index)
+            if value is not None and value[-1] is not None:
+                buckets.setdefault(value, []).append(index)
+        return [group for group in buckets.values() if len(group) > 1]
+
+    def _hash_all(self, executor, indices, hasher, counter):
+        """Hash files in parallel; returns {index: digest} for those that could be read."""
+        if not indices:
+            return {}
+        digests = dict(zip(indices, executor.map(hasher, indices, chunksize=64)))
+        self._count(counter, len(indices))
+        return {index: digest for index, digest in digests.items() if digest is not None}
+
+    def _partial_hash(self, index):
+        if self.token is not None:
+            self.token.check()
+        size = self.records.sizes[index]
+        digest = hashlib.blake2b(digest_size=16)
+        try:
+            with open(os.path.join(self.root_path, self.records.path(index)), 'rb') as f:
+                if size <= 2 * self.BLOCK_BYTES:
+                    data = f.read()
+                    if len(data) != size:
+                        return None  # Changed since it was scanned
+                    digest.update(data)
+                else:
+                    digest.update(f.read(self.BLOCK_BYTES))
+                    f.seek(size - self.BLOCK_BYTES)
+                    digest.update(f.read(self.BLOCK_BYTES))
+        except OSError:
+            return None
+        self._count('duplicate_bytes_read', min(size, 2 * self.BLOCK_BYTES))
+        return digest.hexdigest()
+
+    def _full_hash(self, index):
+        try:
+            digest = hash_file(os.path.join(self.root_path, self.records.path(index)), self.CHUNK_BYTES, self.token)
+        except OSError:
+            return None
+        self._count('duplicate_bytes_read', self.records.sizes[index])
+        return digest
+
+    def _count(self, counter, amount):
+        if self.metrics is not None:
+            self.metrics.add(counter, amount)
@@ -0,0 +1,291 @@
+import math
+import os
+import random
+import time
+from collections import deque
+from pathlib import Path
+
+# Two-sided 95% Student t quantiles by degrees of freedom; 1.96 beyond the table
+T_95 = [(1, 12.706), (2, 4.303), (3, 3.182), (4, 2.776), (5, 2.571), (6, 2.447), (7, 2.365),
+        (8, 2.306), (9, 2.262), (10, 2.228), (12, 2.179), (15, 2.131), (20, 2.086), (30, 2.042),
+        (60, 2.000), (120, 1.980)]
+
+
+def t_quantile(df):
+    """95% two-sided t quantile, rounding df down to the nearest table entry."""
+    if df > T_95[-1][0]:
+        return 1.96
+    return next(quantile for table_df, quantile in reversed(T_95) if table_df <= df)
+
+
+class _Total:
+    """Mean and 95% confidence interval of one quantity over independent rounds."""
+
+    def __init__(self):
+        self.sum = 0.0
+        self.sum_squares = 0.0
+
+    def add(self, value):
+        self.sum += value
+        self.sum_squares += value * value
+
+    def interval(self, rounds):
+        mean = self.sum / rounds
+        if rounds < 2:
+            return mean, None
+        variance = max(0.0, (self.sum_squares - self.sum * mean) / (rounds - 1))
+        return mean, t_quantile(rounds - 1) * math.sqrt(variance / rounds)
+
+
+class TreeEstimator:
+    """Estimate file count, total size and type mix of a tree from a sample.
+
+    Each round walks the tree breadth-first from the root. In every directory
+    it reaches it lists the entries, samples up to FILES_PER_DIR files (only
+    those are stat'ed and analyzed) and descends into up to DIRS_PER_DIR
+    subdirectories, or just one once the round has ROUND_DIRS directories
+    queued. A sampled file stands for weight = product of (entries / sampled)
+    along its path, so each round's weighted sums are unbiased
+    (Horvitz-Thompson) estimates of the tree's totals.
+
+    Rounds use independent random choices, so the spread of their results
+    gives a confidence interval without modelling the sampling design; more
+    rounds narrow it. Directory listings and sampled files are cached between
+    rounds, so later rounds mostly revisit known ground and cost little I/O.
+    A round that never had to sample anything saw the whole tree: its
+    result is exact and no further rounds are run.
+    """
+
+    FILES_PER_DIR = 20  # Files stat'ed and analyzed per directory in a round
+    DIRS_PER_DIR = 3  # Subdirectories descended into per directory while the round is small
+    ROUND_DIRS = 200  # Queued directories after which a round follows one subdirectory per level
+    MIN_ROUNDS = 5  # Rounds run before the interval is trusted to stop early
+    TARGET_ERROR = 0.02  # Stop once files and size are known within +-2% (95% confidence)
+    MAX_CACHED_ENTRIES = 1000000  # Directory entries kept between rounds
+    MAX_CACHED_SAMPLES = 100000  # Analyzed files kept between rounds
+
+    def __init__(self, root_path, sample, skip_dirs=(), project_indicators=None, token=None,
+                 metrics=None, seed=0, on_round=None):
+        self.root_path = str(root_path)
+        self.sample = sample  # (path, stat) -> file_info dict, or None to leave the file out
+        self.skip_dirs = set(skip_dirs)
+        self.token = token
+        self.metrics = metrics
+        self.on_round = on_round  # Called with the current summary after every round
+        self._random = random.Random(seed)
+        self._indicators = {}
+        for project_type, names in (project_indicators or {}).items():
+            for name in names:
+                self._indicators.setdefault(name, []).append(project_type)
+
+        self._listings = {}
+        self._cached_entries = 0
+        self.samples = {}  # Path -> (stat, file_info) of every cached sampled file
+        self.rounds = 0
+        self.exact = False
+        self.directories_listed = 0
+        self._files = _Total()
+        self._size = _Total()
+        self._types = {}  # Type -> (count total, size total)
+        self._projects = {}  # Project type -> indicator file count total
+        self._project_votes = {}  # Project type -> rounds in which it led
+
+    def run(self, deadline):
+        """Run rounds until the interval is tight enough, the tree was seen whole or time runs out."""
+        while not self.exact:
+            # The first round always finishes (unless cancelled); later ones
+            # are abandoned at the deadline, leaving the completed rounds
+            result = self._round(deadline if self.rounds else None)
+            if result is None:
+                break
+            self._add(result)
+            summary = self.summary()
+            if self.on_round is not None:
+                self.on_round(summary)
+            if self.rounds >= self.MIN_ROUNDS and self._precise(summary):
+                break
+            if time.time() >= deadline:
+                break
+        return self.summary()
+
+    def _precise(self, summary):
+        for key in ('files', 'size'):
+            total = summary[key]
+            if total['estimate'] and total['margin'] is not None and \
+                    total['margin'] > self.TARGET_ERROR * total['estimate']:
+                return False
+        return True
+
+    def _round(self, deadline):
+        """One independent sampled walk; returns its weighted totals, or None if interrupted."""
+        files = size = 0.0
+        types = {}
+        projects = {}
+        exact = True
+        visited = 0
+        queue = deque([(self.root_path, 1.0)])
+
+        while queue:
+            if self.token is not None and self.token.cancelled:
+                return None
+            if deadline is not None and time.time() >= deadline:
+                return None
+
+            directory, weight = queue.popleft()
+            visited += 1
+            file_entries, dir_paths = self._listing(directory)
+
+            for name in self._indicator_names(file_entries, dir_paths):
+                for project_type in self._indicators[name]:
+                    projects[project_type] = projects.get(project_type, 0.0) + weight
+
+            if file_entries:
+                chosen = file_entries
+                if len(file_entries) > self.FILES_PER_DIR:
+                    chosen = self._random.sample(file_entries, self.FILES_PER_DIR)
+                    exact = False
+                file_weight = weight * len(file_entries) / len(chosen)
+                for entry in chosen:
+                    sampled = self._sample(entry)
+                    if sampled is None:
+                        continue
+                    file_stat, file_info = sampled
+                    files += file_weight
+                    size += file_weight * file_stat.st_size
+                    mime_type = file_info.get('type', 'unknown')
+                    count, type_size = types.get(mime_type, (0.0, 0.0))
+                    types[mime_type] = (count + file_weight, type_size + file_weight * file_stat.st_size)
+
+            if dir_paths:
+                limit = self.DIRS_PER_DIR if len(queue) < self.ROUND_DIRS else 1
+                chosen = dir_paths
+                if len(dir_paths) > limit:
+                    chosen = self._random.sample(dir_paths, limit)
+                    exact = False
+                dir_weight = weight * len(dir_paths) / len(chosen)
+                queue.extend((path, dir_weight) for path in chosen)
+
+        return {'files': files, 'size': size, 'types': types, 'projects': projects,
+                'exact': exact, 'directories': visited}
+
+    def _indicator_names(self, file_entries, dir_paths):
+        if not self._indicators:
+            return []
+        names = [entry.name for entry in file_entries]
+        names.extend(os.path.basename(path) for path in dir_paths)
+        return [name for name in names if name in self._indicators]
+
+    def _listing(self, directory):
+        """(file entries, subdirectory paths) of a directory, cached between rounds."""
+        listing = self._listings.get(directory)
+        if listing is not None:
+            return listing
+
+        file_entries = []
+        dir_paths = []
+        try:
+            self.directories_listed += 1
+            if self.metrics is not None:
+                self.metrics.add('directories_listed')
+            with os.scandir(directory) as it:
+                for entry in sorted(it, key=lambda e: e.name):
+                    try:
+                        if entry.is_symlink():
+                            continue
+                        if entry.is_dir():
+                            if entry.name not in self.skip_dirs:
+                                dir_paths.append(entry.path)
+                        elif entry.is_file():
+                            file_entries.append(entry)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+        listing = (file_entries, dir_paths)
+        size = len(file_entries) + len(dir_paths)
+        if self._cached_entries + size <= self.MAX_CACHED_ENTRIES:
+            self._listings[directory] = listing
+            self._cached_entries += size
+        return listing
+
+    def _sample(self, entry):
+        """(stat, file_info) of a sampled file, or None if it can't be read."""
+        sampled = self.samples.get(entry.path)
+        if sampled is not None:
+            return sampled
+        try:
+            file_stat = entry.stat()
+        except OSError:
+            return None
+        if self.metrics is not None:
+            self.metrics.add('stat_calls')
+        file_info = self.sample(Path(entry.path), file_stat)
+        if file_info is None:
+            return None
+        sampled = (file_stat, file_info)
+        if len(self.samples) < self.MAX_CACHED_SAMPLES:
+            self.samples[entry.path] = sampled
+        return sampled
+
+    def _add(self, result):
+        if self.rounds == 0 and result['exact']:
+            self.exact = True
+        self.rounds += 1
+        self._files.add(result['files'])
+        self._size.add(result['size'])
+        for mime_type in set(self._types) | set(result['types']):
+            count_total, size_total = self._types.setdefault(mime_type, (_Total(), _Total()))
+            count, size = result['types'].get(mime_type, (0.0, 0.0))
+            count_total.add(count)
+            size_total.add(size)
+        for project_type in set(self._projects) | set(result['projects']):
+            self._projects.setdefault(project_type, _Total()).add(result['projects'].get(project_type, 0.0))
+        if result['projects']:
+            leader = max(sorted(result['projects']), key=result['projects'].get)
+            self._project_votes[leader] = self._project_votes.get(leader, 0) + 1
+
+    def _interval(self, total):
+        if self.rounds == 0:
+            return {'estimate': 0, 'low': 0, 'high': 0, 'margin': None}
+        mean, margin = total.interval(self.rounds)
+        if self.exact:
+            margin = 0.0
+        return {
+            'estimate': round(mean),
+            'low': round(max(0.0, mean - margin)) if margin is not None else None,
+            'high': round(mean + margin) if margin is not None else None,
+            'margin': margin
+        }
+
+    def summary(self):
+        """Current estimates with 95% confidence intervals (None until two rounds have run)."""
+        file_types = []
+        for mime_type, (count_total, size_total) in self._types.items():
+            count = self._interval(count_total)
+            if count['estimate'] or self.exact:
+                count['type'] = mime_type
+                count['size'] = self._interval(size_total)['estimate']
+                file_types.append(count)
+        file_types.sort(key=lambda entry: (-entry['estimate'], entry['type']))
+
+        project_type = None
+        if self._project_votes:
+            leader = max(sorted(self._project_votes), key=self._project_votes.get)
+            project_type = {
+                'type': leader,
+                'indicator_files': self._interval(self._projects[leader])['estimate'],
+                'confidence': self._project_votes[leader] / self.rounds
+            }
+
+        return {
+            'rounds': self.rounds,
+            'exact': self.exact,
+            'confidence_level': 0.95,
+            'files': self._interval(self._files),
+            'size': self._interval(self._size),
+            'file_types': file_types,
+            'project_type': project_type,
+            'directories_listed': self.directories_listed,
+            'files_sampled': len(self.samples)
+        }
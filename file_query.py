@@ -0,0 +1,158 @@
+import base64
+import json
+import os
+import threading
+from array import array
+
+
+class FileQuery:
+    """Filtered, sorted, cursor-paginated listings over a scan's records.
+
+    Records are already in walk (path) order; other sort keys use a
+    permutation of record indices computed on first use and kept, so a page
+    is a walk from the cursor's position rather than a sort. Cursors are
+    opaque tokens holding the sort key, direction and position; they stay
+    valid because a finished scan's records never change. Watch mode does
+    change them: the permutations (then path order too) are recomputed over
+    the live records, and cursors issued before a change may skip or repeat
+    a few rows.
+    """
+
+    SORT_KEYS = ('path', 'name', 'size', 'modified')
+    MAX_LIMIT = 1000
+
+    def __init__(self, records):
+        self.records = records
+        self._orders = {}
+        self._lock = threading.Lock()
+
+    def order(self, sort):
+        """Record indices in ascending sort order, or None for record (path) order."""
+        if sort == 'path' and not self.records.version:
+            return None
+        with self._lock:
+            return self._order(sort)
+
+    def _order(self, sort):
+        records = self.records
+        state = (records.version, len(records))
+        cached = self._orders.get(sort)
+        if cached is not None and cached[0] == state:
+            return cached[1]
+
+        if sort == 'path':
+            from snapshots import path_key
+            key = lambda index: path_key(records.path(index))
+        else:
+            key = {
+                'name': records.names.__getitem__,
+                'size': records.sizes.__getitem__,
+                'modified': records.mtimes.__getitem__
+            }[sort]
+        indices = records.live()
+        if records.version and sort != 'path':
+            indices = self._order('path')
+        # sorted() is stable, so ties stay in path order
+        order = array('I', sorted(indices, key=key))
+        self._orders[sort] = (state, order)
+        return order
+
+    def matcher(self, mime_type=None, min_size=None, max_size=None, directory=None, recursive=True):
+        """Predicate on record indices for the given filters, or None if there are none."""
+        records = self.records
+        checks = []
+
+        if mime_type:
+            # 'image/' or 'image/*' match a whole family
+            prefix = mime_type.rstrip('*')
+            if prefix.endswith('/'):
+                type_ids = {i for i, value in enumerate(records.types) if value.startswith(prefix)}
+            else:
+                type_ids = {i for i, value in enumerate(records.types) if value == mime_type}
+            checks.append(lambda index: records.type_ids[index] in type_ids)
+
+        if min_size is not None:
+            checks.append(lambda index: records.sizes[index] >= min_size)
+        if max_size is not None:
+            checks.append(lambda index: records.sizes[index] <= max_size)
+
+        if directory is not None:
+            directory = os.path.normpath(directory).strip(os.sep)
+            directory = '' if directory == '.' else directory
+            if recursive and not directory:
+                pass
+            elif recursive:
+                prefix = directory + os.sep
+                dir_ids = {i for i, value in enumerate(records.dirs) if value == directory or value.startswith(prefix)}
+                checks.append(lambda index: records.dir_ids[index] in dir_ids)
+            else:
+                dir_ids = {i for i, value in enumerate(records.dirs) if value == directory}
+                checks.append(lambda index: records.dir_ids[index] in dir_ids)
+
+        if not checks:
+            return None
+        if len(checks) == 1:
+            return checks[0]
+        return lambda index: all(check(index) for check in checks)
+
+    def iter_indices(self, sort='path', descending=False, match=None, start=0):
+        """Yield (position, record index) of matching records from a position on."""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Unknown sort key: {sort}")
+        order = self.order(sort)
+        count = len(self.records) if order is None else len(order)
+        for position in range(start, count):
+            ordinal = count - 1 - position if descending else position
+            index = order[ordinal] if order is not None else ordinal
+            if match is None or match(index):
+                yield position, index
+
+    def page(self, limit=100, cursor=None, sort='path', descending=False, **filters):
+        """One page of matching rows and the cursor for the next page (None at the end)."""
+        limit = max(1, min(limit, self.MAX_LIMIT))
+        start = 0
+        if cursor:
+            cursor_sort, cursor_descending, start = decode_cursor(cursor)
+            if (cursor_sort, cursor_descending) != (sort, descending):
+                raise ValueError("Cursor was issued for a different sort order")
+
+        rows = []
+        next_cursor = None
+        for position, index in self.iter_indices(sort, descending, self.matcher(**filters), start):
+            if len(rows) == limit:
+                next_cursor = encode_cursor(sort, descending, position)
+                break
+            rows.append(self.row(index))
+        return rows, next_cursor
+
+    def row(self, index):
+        """JSON-ready listing entry for a record."""
+        record = self.records.get(index)
+        row = {
+            'path': record['path'],
+            'size': record['size'],
+            'modified': record['modified'].strftime('%Y-%m-%d %H:%M:%S'),
+            'created': record['created'].strftime('%Y-%m-%d %H:%M:%S'),
+            'type': record['type']
+        }
+        content_hash = self.records.hashes.get(index)
+        if content_hash:
+            row['hash'] = content_hash
+        return row
+
+
+def encode_cursor(sort, descending, position):
+    token = json.dumps([sort, descending, position], separators=(',', ':')).encode('ascii')
+    return base64.urlsafe_b64encode(token).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(sort, descending, position) from a cursor; raises ValueError if malformed."""
+    try:
+        token = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort, descending, position = json.loads(token)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, int) or position < 0:
+        raise ValueError("Invalid cursor")
+    return sort, bool(descending), position
@@ -1,23 +1,129 @@
 import os
-import magic
+import sys
 from datetime import datetime
 from pathlib import Path
-import chardet
-import re
+import codecs
 from collections import defaultdict
-import ast
 import mimetypes
 import time
+import threading
+import heapq
+import json
+import random
+import stat
+from collections import deque
+from record_store import FileRecordStore
+from content_types import ContentClassifier, BINARY_TYPES
+from related_files import RelatedFileIndex
+from metrics import ScanMetrics, ScanProfiler
+from import_extractors import EXTRACTORS, extract_imports
+from dependency_graph import DependencyGraph
+from dir_tree import DirectoryTree
+# Worker pools, the scan cache, snapshots and the duplicate and estimate
+# passes and the watcher are imported where they are used, so a metadata-only
+# run starts fast
+
+class ScanCancelled(Exception):
+    """Raised inside a scan when its cancellation token fires."""
+
+class CancellationToken:
+    """Cooperative cancellation flag with an optional wall-clock deadline.
+
+    The flag can be a multiprocessing Event so that worker processes see a
+    cancellation too; the deadline is absolute time.time() for the same reason.
+    """
+
+    def __init__(self, event=None, deadline=None):
+        self.event = event if event is not None else threading.Event()
+        self.deadline = deadline
+        self.reason = None
+
+    def cancel(self, reason='cancelled'):
+        if self.reason is None:
+            self.reason = reason
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        if self.event.is_set():
+            return True
+        if self.deadline is not None and time.time() > self.deadline:
+            self.cancel('timeout')
+            return True
+        return False
+
+    def check(self):
+        """Raise ScanCancelled if the scan should stop."""
+        if self.cancelled:
+            raise ScanCancelled(self.reason or 'cancelled')
 
 class FolderAnalyzer:
     # Maximum limits
-    MAX_FILES = 10000  # Maximum number of files to analyze
+    MAX_FILES = 2000000  # Maximum number of files to analyze
     MAX_SIZE_GB = 50   # Maximum total size in GB to analyze
     MAX_TIME_SECONDS = 900  # Maximum analysis time (15 minutes)
     MAX_CLOUD_FILE_SIZE_MB = 10  # Maximum size for cloud storage files (10MB)
 
-    def __init__(self, root_path):
+    # Directories that are never descended into
+    SKIP_DIRS = {'.git', '.hg', '.svn', 'node_modules', '__pycache__'}
+
+    # Worker pool settings
+    WORKER_BACKENDS = ('thread', 'process')
+    QUEUE_DEPTH_PER_WORKER = 8  # Files in flight per worker before enumeration waits
+
+    # Streaming aggregation limits
+    TOP_FILES = 10  # Entries kept in the largest/newest lists
+    GROUP_SAMPLE_SIZE = 10  # Sample files kept per content type
+
+    # Bump whenever analyze_file() output changes so cached results are discarded
+    ANALYZER_VERSION = 7
+
+    # Estimate mode
+    ESTIMATE_SAMPLE_SEED = 0  # Seed for estimate-mode sampling, so estimates are reproducible
+    ESTIMATE_PROJECT_CONFIDENCE = 0.5  # Share of rounds that must agree before an estimated project type is used
+
+    # Duplicate detection
+    DUPLICATE_HASH_WORKERS = 4  # Minimum threads hashing duplicate candidates
+
+    # Content reading
+    MAX_CONTENT_MB = 64  # Maximum bytes read from a single file
+    READ_CHUNK_BYTES = 1024 * 1024  # Sequential read size; the first chunk feeds encoding detection
+    PREVIEW_BYTES = 1024  # Bytes decoded for a documentation preview
+
+    def __init__(self, root_path, metadata_only=False, skip_dirs=None, workers=1, backend='thread',
+                 cache_path=None, spill_path=None, classify_mode='fast', max_content_bytes=None,
+                 profile=False, content_hashes=False, snapshot_path=None, find_duplicates=False,
+                 estimate=False, estimate_seconds=None):
+        if backend not in self.WORKER_BACKENDS:
+            raise ValueError(f"Unknown worker backend: {backend}")
         self.root_path = Path(root_path)
+        self.metadata_only = metadata_only
+        self.skip_dirs = set(self.SKIP_DIRS if skip_dirs is None else skip_dirs)
+        self.workers = max(1, int(workers or 1))
+        self.backend = backend
+        self.cache_path = cache_path
+        self.cache = None
+        self.content_hashes = content_hashes
+        self.snapshot_path = snapshot_path
+        self.find_duplicates = find_duplicates
+        self.estimate = estimate  # Sample the tree instead of walking all of it
+        self.estimate_seconds = estimate_seconds  # Time budget for refining an estimate; MAX_TIME_SECONDS if None
+        self.enumeration_complete = False
+        self.spill_path = spill_path
+        self._spill_file = None
+        self._largest_heap = []
+        self._newest_heap = []
+        self.records = FileRecordStore()
+        self.related_index = RelatedFileIndex()
+        self.dependency_graph = DependencyGraph()
+        self._graph_edits = self.dependency_graph  # Where merged imports go; an unbuilt copy in watch mode
+        self.dir_tree = DirectoryTree()
+        self.live_lock = threading.RLock()  # Held while watch mode updates the results
+        self._dependency_counts = None  # Module name -> importing files, once watch mode starts
+        self._views_stale = False  # Graph and tree lag behind watch-mode changes
+        self.metrics = ScanMetrics()
+        self.profile = profile
+        self._sampler = random.Random(0)  # Seeded so samples are reproducible
         self.stats = {
             'total_files': 0,
             'total_size': 0,
@@ -25,9 +131,20 @@ class FolderAnalyzer:
             'largest_files': [],
             'newest_files': [],
             'project_type': None,
-            'content_groups': defaultdict(list),
+            'content_groups': {},
             'dependencies': set(),
+            'dependency_graph': None,
+            'snapshot': None,
+            'duplicates': None,
+            'estimate': None,
+            'truncated': None,
+            'live': None,
             'related_files': defaultdict(list),
+            'cache': None,
+            'classifier': {'type': {}, 'encoding': {}},
+            'partial': False,
+            'metrics': None,
+            'profile': None,
             'progress': {
                 'current': 0,
                 'total': 0,
@@ -35,10 +152,21 @@ class FolderAnalyzer:
                 'stage': 'Initializing',
                 'start_time': None,
                 'elapsed_time': 0,
+                'cancelled': False,
                 'warnings': []
             }
         }
-        self.mime = magic.Magic(mime=True)
+        self.classifier = ContentClassifier(classify_mode)
+        self._progress_changed = threading.Condition()
+        self._progress_version = 0
+        # Worker processes can only share a multiprocessing Event
+        if backend == 'process':
+            import multiprocessing
+            self._mp_context = multiprocessing.get_context()
+        else:
+            self._mp_context = None
+        self.token = CancellationToken(self._mp_context.Event() if self._mp_context else None)
+        self.max_content_bytes = max_content_bytes or self.MAX_CONTENT_MB * 1024 * 1024
         self.project_indicators = {
             'python': ['requirements.txt', 'setup.py', 'pyproject.toml'],
             'node': ['package.json', 'node_modules'],
@@ -62,43 +190,114 @@ class FolderAnalyzer:
         path_str = str(path).lower()
         return any(indicator.lower() in path_str for indicator in cloud_indicators)
 
-    def should_skip_file(self, file_path):
+    def iter_files(self, top=None):
+        """Walk the tree with os.scandir, yielding (path, stat) for every regular file.
+
+        DirEntry caches the file type from the directory listing, so symlinks and
+        directories are recognised without extra syscalls and each file is stat'ed
+        exactly once. Directories named in skip_dirs are pruned before descending.
+        top walks just that directory instead of the whole tree.
+        """
+        stack = [self._sorted_entries(str(top if top is not None else self.root_path))]
+        while stack:
+            if self.token.cancelled:
+                return
+
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+
+            try:
+                # Skip symlinks (to files and directories alike)
+                if entry.is_symlink():
+                    continue
+                if entry.is_dir():
+                    if entry.name not in self.skip_dirs:
+                        stack.append(self._sorted_entries(entry.path))
+                    continue
+                if not entry.is_file():
+                    continue
+                file_stat = entry.stat()
+                self.metrics.add('stat_calls')
+            except OSError:
+                self.add_warning(f"Cannot access file: {entry.path}")
+                continue
+
+            yield Path(entry.path), file_stat
+
+    def count_files(self):
+        """Number of regular files in the tree (at most MAX_FILES), for the progress total.
+
+        Only directories are listed; DirEntry already knows each entry's type,
+        so nothing is stat'ed and nothing is kept.
+        """
+        count = 0
+        stack = [str(self.root_path)]
+        while stack and count < self.MAX_FILES and not self.token.cancelled:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    for entry in it:
+                        try:
+                            if entry.is_symlink():
+                                continue
+                            if entry.is_dir():
+                                if entry.name not in self.skip_dirs:
+                                    stack.append(entry.path)
+                            elif entry.is_file():
+                                count += 1
+                        except OSError:
+                            continue
+            except OSError:
+                continue
+        return min(count, self.MAX_FILES)
+
+    def _sorted_entries(self, directory):
+        """List a directory once, sorted by name so walks are deterministic."""
+        try:
+            self.metrics.add('directories_listed')
+            with os.scandir(directory) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            self.add_warning(f"Cannot read directory: {directory}")
+            entries = []
+        return iter(entries)
+
+    def should_skip_file(self, file_path, file_stat=None):
         """Determine if a file should be skipped."""
         try:
-            # Skip if file is a symlink
-            if file_path.is_symlink():
-                return True
+            if file_stat is None:
+                # Skip if file is a symlink
+                if file_path.is_symlink():
+                    return True
 
-            # Check if file exists and is readable
-            if not file_path.exists() or not os.access(file_path, os.R_OK):
-                return True
+                try:
+                    file_stat = file_path.stat()
+                except (OSError, IOError):
+                    # If we can't get the size, skip the file
+                    self.add_warning(f"Cannot access file: {file_path}")
+                    return True
 
-            # Get file size
-            try:
-                file_size = file_path.stat().st_size
-            except (OSError, IOError):
-                # If we can't get the size, skip the file
-                self.stats['progress']['warnings'].append(f"Cannot access file: {file_path}")
-                return True
+            file_size = file_stat.st_size
 
             # Special handling for cloud storage files
             if self.is_cloud_storage:
                 # Skip large files in cloud storage to prevent long downloads
                 if file_size > (self.MAX_CLOUD_FILE_SIZE_MB * 1024 * 1024):
-                    self.stats['progress']['warnings'].append(
+                    self.add_warning(
                         f"Skipping large cloud file ({self.human_size(file_size)}): {file_path}"
                     )
                     return True
 
-            # Check overall size limit
+            # Check overall size limit; enumerate_files() stops the walk here
             if self.total_size + file_size > (self.MAX_SIZE_GB * 1024 * 1024 * 1024):
-                self.stats['progress']['warnings'].append(f"Size limit reached ({self.MAX_SIZE_GB}GB)")
+                self._truncate('max_size', f"Size limit reached ({self.MAX_SIZE_GB}GB)")
                 return True
 
             self.total_size += file_size
             return False
         except Exception as e:
-            self.stats['progress']['warnings'].append(f"Error accessing {file_path}: {str(e)}")
+            self.add_warning(f"Error accessing {file_path}: {str(e)}")
             return True
 
     def update_progress(self, stage, current=None, total=None, current_file=None):
@@ -113,11 +312,38 @@ class FolderAnalyzer:
         
         if self.stats['progress']['start_time'] is not None:
             self.stats['progress']['elapsed_time'] = time.time() - self.stats['progress']['start_time']
+        self.notify_progress()
+
+    def add_warning(self, message):
+        """Record a warning and notify progress listeners."""
+        self.stats['progress']['warnings'].append(message)
+        self.notify_progress()
+
+    def notify_progress(self):
+        """Wake up anything waiting in wait_for_progress()."""
+        with self._progress_changed:
+            self._progress_version += 1
+            self._progress_changed.notify_all()
+
+    def wait_for_progress(self, version, timeout=None):
+        """Block until progress changes past version (or timeout); return the new version."""
+        with self._progress_changed:
+            self._progress_changed.wait_for(lambda: self._progress_version != version, timeout)
+            return self._progress_version
+
+    def get_progress(self, include_metrics=False):
+        """Get the current progress information.
 
-    def get_progress(self):
-        """Get the current progress information."""
+        Live metrics change on every tick, so they are only added when asked
+        for; otherwise every streamed progress delta would carry all of them.
+        """
         progress = self.stats['progress'].copy()
-        if progress['total'] > 0:
+        if include_metrics:
+            progress['metrics'] = self.metrics.summary(include_slowest=False)
+        if progress['total'] is None:
+            # Still counting: the total, and so the percentage, is unknown
+            progress['percentage'] = None
+        elif progress['total'] > 0:
             progress['percentage'] = (progress['current'] / progress['total']) * 100
         else:
             progress['percentage'] = 0
@@ -131,73 +357,113 @@ class FolderAnalyzer:
                 return proj_type
         return 'unknown'
 
-    def analyze_code_file(self, file_path, content):
+    def analyze_code_file(self, file_path, content, counters=None):
         """Analyze code files for imports and dependencies."""
-        file_ext = file_path.suffix.lower()
-        deps = set()
-
-        if file_ext == '.py':
-            try:
-                tree = ast.parse(content)
-                for node in ast.walk(tree):
-                    if isinstance(node, ast.Import):
-                        deps.update(name.name for name in node.names)
-                    elif isinstance(node, ast.ImportFrom):
-                        deps.add(node.module)
-            except:
-                pass
-        elif file_ext in ['.js', '.ts']:
-            # Look for import/require statements
-            import_patterns = [
-                r'import\s+.*?from\s+[\'"](.+?)[\'"]',
-                r'require\([\'"](.+?)[\'"]\)'
-            ]
-            for pattern in import_patterns:
-                deps.update(re.findall(pattern, content))
-
-        return deps
+        return extract_imports(file_path.suffix.lower(), content, counters)
 
     def group_related_files(self, file_path, content_type):
         """Group related files based on naming and content type."""
-        stem = file_path.stem
-        parent = file_path.parent.name
-        
-        # Group by common prefixes
-        for existing_path in self.stats['related_files']:
-            existing_stem = Path(existing_path).stem
-            if (stem in existing_stem or existing_stem in stem) and len(stem) > 3:
-                self.stats['related_files'][existing_path].append(str(file_path))
-                return
+        # Join the earliest group whose head stem contains, or is contained
+        # in, this file's stem; the index answers that without a full scan
+        head = self.related_index.find(file_path.stem)
+        if head is not None:
+            self.stats['related_files'][head].append(str(file_path))
+            return
 
         # New group
         self.stats['related_files'][str(file_path)] = []
+        self.related_index.add(str(file_path), file_path.stem)
+
+    def analyze_content(self, file_path, content_type, file_metrics=None):
+        """Analyze file content based on its type.
+
+        Stage timings and I/O counters are added to file_metrics if given.
+        """
+        if file_metrics is None:
+            file_metrics = {'stages': {}, 'counters': {}}
+        stages = file_metrics['stages']
+        counters = file_metrics['counters']
 
-    def analyze_content(self, file_path, content_type):
-        """Analyze file content based on its type."""
         try:
             if 'text' not in content_type and 'application' not in content_type:
                 return {'type': 'binary', 'summary': 'Binary file'}
+            if content_type in BINARY_TYPES:
+                # Archives, executables and the like: nothing to count or decode
+                return {'summary': 'Binary file'}
+
+            suffix = file_path.suffix.lower()
+            is_code = suffix in EXTRACTORS
+            is_doc = suffix in ['.md', '.rst', '.txt']
 
+            # Single sequential pass: the first chunk feeds encoding detection,
+            # newlines are counted on raw bytes, and the bytes are only kept
+            # when an analyzer needs the decoded text
+            read_start = time.perf_counter()
             with open(file_path, 'rb') as f:
-                raw_data = f.read(1024 * 1024)  # Read first 1MB
-                result = chardet.detect(raw_data)
-                encoding = result['encoding'] or 'utf-8'
+                head = f.read(min(self.READ_CHUNK_BYTES, self.max_content_bytes))
+                if self.classifier.looks_binary(head):
+                    # Not plausibly text, so chardet and the rest of the read are skipped
+                    stages['content_read'] = time.perf_counter() - read_start
+                    counters['files_opened'] = counters.get('files_opened', 0) + 1
+                    counters['bytes_read'] = counters.get('bytes_read', 0) + len(head)
+                    return {'summary': 'Binary file'}
+
+                detect_start = time.perf_counter()
+                encoding, encoding_source = self.classifier.detect_encoding(head)
+                stages['encoding_detection'] = time.perf_counter() - detect_start
+
+                # Multi-byte encodings can't be line-counted on raw bytes
+                wide = codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
+                chunks = [head] if is_code or wide else None
+                bytes_read = len(head)
+                newlines = head.count(b'\n')
+                last_byte = head[-1:]
+
+                while bytes_read < self.max_content_bytes:
+                    self.token.check()
+                    chunk = f.read(min(self.READ_CHUNK_BYTES, self.max_content_bytes - bytes_read))
+                    if not chunk:
+                        break
+                    bytes_read += len(chunk)
+                    newlines += chunk.count(b'\n')
+                    last_byte = chunk[-1:]
+                    if chunks is not None:
+                        chunks.append(chunk)
+
+                truncated = bytes_read >= self.max_content_bytes and f.read(1) != b''
 
-            with open(file_path, 'r', encoding=encoding) as f:
-                content = f.read()
+            content = None
+            if chunks is not None:
+                # A truncated read may end inside a character; the incremental
+                # decoder holds that back instead of failing
+                decoder = codecs.getincrementaldecoder(encoding)()
+                content = decoder.decode(b''.join(chunks), final=not truncated)
+                chunks = None
+
+            stages['content_read'] = time.perf_counter() - read_start - stages['encoding_detection']
+            counters['files_opened'] = counters.get('files_opened', 0) + 1
+            counters['bytes_read'] = counters.get('bytes_read', 0) + bytes_read
+
+            if wide:
+                lines = len(content.splitlines())
+            else:
+                lines = newlines + (1 if last_byte not in (b'', b'\n') else 0)
 
             analysis = {
                 'type': content_type,
                 'encoding': encoding,
-                'size': len(content),
-                'lines': len(content.splitlines())
+                'encoding_source': encoding_source,
+                'lines': lines
             }
+            if truncated:
+                analysis['truncated'] = True
 
             # Code analysis
-            if any(ext in file_path.suffix.lower() for ext in ['.py', '.js', '.java', '.cpp', '.ts']):
-                deps = self.analyze_code_file(file_path, content)
-                analysis['dependencies'] = list(deps)
-                self.stats['dependencies'].update(deps)
+            if is_code:
+                deps_start = time.perf_counter()
+                deps = self.analyze_code_file(file_path, content, counters)
+                stages['dependency_extraction'] = time.perf_counter() - deps_start
+                analysis['dependencies'] = sorted(deps)
 
             # Configuration files
             elif file_path.suffix.lower() in ['.json', '.yaml', '.yml', '.toml']:
@@ -206,26 +472,61 @@ class FolderAnalyzer:
                     analysis['purpose'] = 'dependency_management'
 
             # Documentation
-            elif file_path.suffix.lower() in ['.md', '.rst', '.txt']:
+            elif is_doc:
                 analysis['doc_type'] = 'documentation'
-                analysis['preview'] = content[:200] + '...' if len(content) > 200 else content
+                preview = codecs.getincrementaldecoder(encoding)().decode(head[:self.PREVIEW_BYTES])
+                analysis['preview'] = preview[:200] + '...' if len(preview) > 200 else preview
 
             return analysis
 
+        except ScanCancelled:
+            raise
         except Exception as e:
             return {'error': str(e)}
 
-    def get_file_info(self, file_path):
+    def analyze_file(self, file_path):
+        """Detect a file's type and analyze its content.
+
+        The result depends only on the file's content, so it can be computed
+        in a worker and stored in the scan cache.
+        """
+        file_metrics = {'stages': {}, 'counters': {}}
+
+        start = time.perf_counter()
+        if self.metadata_only:
+            mime_type = mimetypes.guess_type(str(file_path))[0] or 'unknown'
+            type_source = 'mimetypes'
+        else:
+            mime_type, type_source = self.classifier.classify(file_path, file_metrics['counters'])
+        file_metrics['stages']['mime_detection'] = time.perf_counter() - start
+
+        analysis = {'type': mime_type, 'type_source': type_source}
+
+        # Analyze content
+        if not self.metadata_only:
+            analysis.update(self.analyze_content(file_path, mime_type, file_metrics))
+
+        if self.content_hashes:
+            from snapshots import hash_file
+            start = time.perf_counter()
+            try:
+                analysis['hash'] = hash_file(file_path, self.READ_CHUNK_BYTES, self.token)
+                file_metrics['counters']['files_hashed'] = 1
+            except OSError:
+                pass
+            file_metrics['stages']['content_hash'] = time.perf_counter() - start
+
+        # Timings travel with the result so worker processes can report them;
+        # _collect_result() strips them before caching
+        analysis['_metrics'] = file_metrics
+        return analysis
+
+    def get_file_info(self, file_path, file_stat=None, analysis=None):
         """Get detailed information about a file."""
-        stats = file_path.stat()
+        stats = file_stat if file_stat is not None else file_path.stat()
         size = stats.st_size
         created = datetime.fromtimestamp(stats.st_ctime)
         modified = datetime.fromtimestamp(stats.st_mtime)
-        
-        try:
-            mime_type = self.mime.from_file(str(file_path))
-        except:
-            mime_type = mimetypes.guess_type(str(file_path))[0] or 'unknown'
 
         # Convert to relative path for display
         try:
@@ -237,96 +538,696 @@ class FolderAnalyzer:
             'path': relative_path,  # Use relative path instead of absolute
             'absolute_path': str(file_path),  # Keep absolute path for internal use
             'size': size,
-            'size_human': self.human_size(size),
             'created': created,
-            'modified': modified,
-            'type': mime_type
+            'modified': modified
         }
 
-        # Analyze content
-        content_analysis = self.analyze_content(file_path, mime_type)
-        file_info.update(content_analysis)
-
-        # Group related files
-        self.group_related_files(file_path, mime_type)
+        if analysis is None:
+            analysis = self.analyze_file(file_path)
+        file_info.update(analysis)
 
         return file_info
 
+    def record_file(self, file_path, file_stat, file_info, index=None):
+        """Merge one file's information into the scan statistics.
+
+        In watch mode a changed file passes the index of its existing record,
+        which is rewritten in place (after _unrecord_file()) and keeps its
+        related-file group.
+        """
+        content_type = file_info.get('type', 'unknown')
+        if index is None:
+            index = self.records.append(
+                file_info['path'], file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ctime_ns, content_type,
+                file_stat.st_dev, file_stat.st_ino
+            )
+            # Group related files
+            self.group_related_files(file_path, content_type)
+        else:
+            self.records.update(index, file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ctime_ns, content_type,
+                                file_stat.st_dev, file_stat.st_ino)
+
+        self.stats['total_files'] += 1
+        self.stats['total_size'] += file_stat.st_size
+        dependencies = file_info.get('dependencies')
+        if dependencies:
+            self.stats['dependencies'].update(dependencies)
+            self._graph_edits.add(index, dependencies)
+            if self._dependency_counts is not None:
+                for name in dependencies:
+                    self._dependency_counts[name] = self._dependency_counts.get(name, 0) + 1
+        if 'hash' in file_info:
+            self.records.hashes[index] = file_info['hash']
+
+        # Group by content type: a count plus a fixed-size reservoir sample
+        group = self.stats['content_groups'].get(content_type)
+        if group is None:
+            group = self.stats['content_groups'][content_type] = {'count': 0, 'files': []}
+        group['count'] += 1
+        if len(group['files']) < self.GROUP_SAMPLE_SIZE:
+            group['files'].append(file_info)
+        else:
+            slot = self._sampler.randrange(group['count'])
+            if slot < self.GROUP_SAMPLE_SIZE:
+                group['files'][slot] = file_info
+
+        # Track file types
+        self.stats['file_types'][content_type] = self.stats['file_types'].get(content_type, 0) + 1
+
+        # Track largest and newest files in bounded min-heaps; on ties the
+        # earlier file wins, as with a stable sort
+        self._push_top(self._largest_heap, (file_stat.st_size, -index))
+        self._push_top(self._newest_heap, (file_stat.st_mtime_ns, -index))
+
+        if self._spill_file is not None:
+            self._spill_file.write(json.dumps(file_info, default=str) + '\n')
+        return index
+
+    def _push_top(self, heap, item):
+        if len(heap) < self.TOP_FILES:
+            heapq.heappush(heap, item)
+        elif item > heap[0]:
+            heapq.heapreplace(heap, item)
+
+    def _finalize_top_files(self):
+        """Materialize the largest/newest lists (record indices) from their heaps."""
+        self.stats['largest_files'] = [-item[1] for item in sorted(self._largest_heap, reverse=True)]
+        self.stats['newest_files'] = [-item[1] for item in sorted(self._newest_heap, reverse=True)]
+
+    def enumerate_files(self):
+        """Yield (path, stat) for every file that passes the scan limits."""
+        total_files = 0
+        files = self.iter_files()
+        while True:
+            start = time.perf_counter()
+            item = next(files, None)
+            self.metrics.observe('enumeration', time.perf_counter() - start)
+            if item is None:
+                break
+
+            file_path, file_stat = item
+            if not self.should_skip_file(file_path, file_stat):
+                total_files += 1
+                yield file_path, file_stat
+
+                if total_files >= self.MAX_FILES:
+                    self._truncate('max_files', f"File limit reached ({self.MAX_FILES} files)")
+            if self.stats['truncated']:
+                return
+
+        # iter_files() also stops early when the scan is cancelled
+        self.enumeration_complete = not self.token.cancelled
+
+    def _truncate(self, reason, message):
+        """Stop enumeration at a scan limit, flagging the result as covering only part of the tree.
+
+        Files past the cutoff are simply never seen, so totals and distributions
+        are biased towards whatever the walk reached first; estimate mode gives
+        unbiased figures for trees this large.
+        """
+        if self.stats['truncated'] is None:
+            self.stats['truncated'] = reason
+            self.add_warning(f"{message}; results cover only part of the tree. Use estimate mode for trees this large.")
+
+    def analyze_files(self, files):
+        """Yield (path, stat, file_info) for each file, in the order the files were given.
+
+        Files with a valid scan cache entry are not read at all. With more
+        than one worker, the rest are fed to a thread or process pool through
+        a bounded window of pending futures, so enumeration overlaps with
+        analysis without queueing the whole tree in memory. Results are
+        yielded in submission order, which keeps the merged stats deterministic.
+        """
+        executor = None
+        if self.workers > 1:
+            from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+            if self.backend == 'process':
+                executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=self._mp_context,
+                    initializer=_init_worker,
+                    initargs=(str(self.root_path), self._worker_options(), self.token.event, self.token.deadline)
+                )
+                analyze = _analyze_in_worker
+            else:
+                executor = ThreadPoolExecutor(max_workers=self.workers)
+                analyze = self.analyze_file
+
+        max_pending = self.workers * self.QUEUE_DEPTH_PER_WORKER if executor else 1
+        pending = deque()
+        try:
+            for file_path, file_stat in files:
+                if self.token.cancelled:
+                    break
+                cached = self._cache_lookup(file_path, file_stat)
+                if cached is not None:
+                    pending.append((file_path, file_stat, cached, False))
+                elif executor is None:
+                    pending.append((file_path, file_stat, self.analyze_file(file_path), True))
+                else:
+                    pending.append((file_path, file_stat, executor.submit(analyze, file_path), True))
+
+                while len(pending) >= max_pending:
+                    yield self._collect_result(*pending.popleft())
+            while pending:
+                yield self._collect_result(*pending.popleft())
+        finally:
+            if executor is not None:
+                # Running tasks watch the same token, so this returns quickly on cancel
+                executor.shutdown(wait=True, cancel_futures=True)
+
+    def _cache_lookup(self, file_path, file_stat):
+        """Cached analysis of an unchanged file, or None; a cache error is only a miss."""
+        if self.cache is None:
+            return None
+        try:
+            return self.cache.lookup(file_path, file_stat)
+        except Exception as e:
+            self.add_warning(f"Cannot read the scan cache for {file_path}: {str(e)}")
+            return None
+
+    def _worker_options(self):
+        """Constructor arguments that affect analyze_file(), for worker processes."""
+        return {
+            'metadata_only': self.metadata_only,
+            'classify_mode': self.classifier.mode,
+            'max_content_bytes': self.max_content_bytes,
+            'content_hashes': self.content_hashes
+        }
+
+    def _collect_result(self, file_path, file_stat, analysis, fresh):
+        """Finish one file's analysis and return (path, stat, file_info or None)."""
+        if not isinstance(analysis, dict):  # A Future from the worker pool
+            try:
+                analysis = analysis.result()
+            except ScanCancelled:
+                return file_path, file_stat, None
+            except Exception as e:
+                self.add_warning(f"Error analyzing {file_path}: {str(e)}")
+                return file_path, file_stat, None
+
+        file_metrics = analysis.pop('_metrics', None)
+
+        if fresh:
+            # Count which classifier tiers did the work, for tuning
+            self._count_tier('type', analysis.get('type_source'))
+            self._count_tier('encoding', analysis.get('encoding_source'))
+
+            # Don't cache errors, they are often transient (locked or vanished files)
+            if self.cache is not None and 'error' not in analysis:
+                try:
+                    self.cache.store(file_path, file_stat, analysis)
+                except Exception as e:
+                    self.add_warning(f"Cannot cache {file_path}: {str(e)}")
+
+        file_info = self.get_file_info(file_path, file_stat, analysis)
+        if file_metrics is not None:
+            self.metrics.record_file(file_info['path'], file_metrics)
+        return file_path, file_stat, file_info
+
+    def _count_tier(self, kind, tier):
+        if tier is not None:
+            counts = self.stats['classifier'][kind]
+            counts[tier] = counts.get(tier, 0) + 1
+
     def scan(self):
         """Scan the folder and collect information."""
         self.start_time = time.time()
         self.stats['progress']['start_time'] = self.start_time
+        self.token.deadline = self.start_time + self.MAX_TIME_SECONDS
         self.update_progress("Detecting project type")
         
         # Add warning for cloud storage
         if self.is_cloud_storage:
-            self.stats['progress']['warnings'].append(
+            self.add_warning(
                 f"Analyzing cloud storage folder. Files larger than {self.MAX_CLOUD_FILE_SIZE_MB}MB will be skipped to prevent long downloads."
             )
 
         # Detect project type first
         self.stats['project_type'] = self.detect_project_type()
         
-        # Count total files first
-        self.update_progress("Counting files")
-        files = []
-        total_files = 0
-        
-        for file_path in self.root_path.rglob('*'):
-            if time.time() - self.start_time > self.MAX_TIME_SECONDS:
-                self.stats['progress']['warnings'].append(f"Analysis timeout after {self.MAX_TIME_SECONDS} seconds")
-                break
-                
-            if file_path.is_file() and not self.should_skip_file(file_path):
-                total_files += 1
-                files.append(file_path)
-                
-                if total_files >= self.MAX_FILES:
-                    self.stats['progress']['warnings'].append(f"File limit reached ({self.MAX_FILES} files)")
-                    break
+        if self.cache_path and not self.metadata_only:
+            variant = self.classifier.mode + ('+hashes' if self.content_hashes else '')
+            from scan_cache import ScanCache
+            self.cache = ScanCache(self.cache_path, self.ANALYZER_VERSION, variant)
+
+        if self.spill_path:
+            # Full per-file records go to disk as JSON lines instead of memory;
+            # a .gz path is compressed as it is written
+            if str(self.spill_path).endswith('.gz'):
+                import gzip
+                self._spill_file = gzip.open(self.spill_path, 'wt', encoding='utf-8', compresslevel=6)
+            else:
+                self._spill_file = open(self.spill_path, 'w', encoding='utf-8')
+
+        try:
+            if self.profile:
+                # Captures the main thread: enumeration, merging and serial analysis
+                with ScanProfiler() as profiler:
+                    current_file_count = self._estimate_files() if self.estimate else self._scan_files()
+                self.stats['profile'] = profiler.report()
+            else:
+                current_file_count = self._estimate_files() if self.estimate else self._scan_files()
+
+            # The graph, tree and duplicates describe actual files, so an
+            # estimate (which only has a sample of them) skips them
+            if not self.estimate:
+                self.update_progress("Building dependency graph")
+                graph_start = time.perf_counter()
+                self.dependency_graph.build(self.records)
+                self.metrics.observe('dependency_graph', time.perf_counter() - graph_start)
+                self.stats['dependency_graph'] = self.dependency_graph.summary()
+
+                tree_start = time.perf_counter()
+                self.dir_tree.build(self.records)
+                self.metrics.observe('directory_tree', time.perf_counter() - tree_start)
+
+            if self.find_duplicates and not self.estimate and not self.token.cancelled:
+                self.update_progress("Finding duplicate files")
+                duplicates_start = time.perf_counter()
+                from duplicates import DuplicateFinder
+                finder = DuplicateFinder(
+                    self.root_path, self.records, workers=max(self.workers, self.DUPLICATE_HASH_WORKERS),
+                    token=self.token, metrics=self.metrics
+                )
+                try:
+                    self.stats['duplicates'] = finder.find()
+                except ScanCancelled:
+                    pass
+                self.metrics.observe('duplicates', time.perf_counter() - duplicates_start)
+
+            # Drop cache entries for files that no longer exist, but only when
+            # the whole tree was walked; a truncated walk hasn't seen them all
+            if self.cache is not None:
+                if self.enumeration_complete and self.token.reason is None:
+                    self.cache.evict_missing(self.root_path)
+                self.stats['cache'] = self.cache.get_stats()
+        finally:
+            self._finalize_top_files()
+            self.stats['metrics'] = self.metrics.summary()
+            if self.cache is not None:
+                self.cache.close()
+                self.cache = None
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+
+        if self.token.reason is not None:
+            # Whatever was merged before the stop is kept as a partial result
+            self.enumeration_complete = False
+            self.stats['partial'] = True
+            self.stats['progress']['cancelled'] = True
+            if self.token.reason == 'timeout':
+                self.add_warning(f"Analysis timeout after {self.MAX_TIME_SECONDS} seconds")
+                stage = "Analysis stopped at time limit (partial results)"
+            else:
+                stage = "Analysis cancelled (partial results)"
+        elif self.stats['truncated']:
+            self.stats['partial'] = True
+            stage = "Analysis stopped at scan limit (partial results)"
+        elif self.estimate:
+            stage = "Estimate complete"
+        elif self.stats['progress']['warnings']:
+            stage = "Analysis completed with warnings"
+        else:
+            stage = "Analysis complete"
+
+        if self.snapshot_path and not self.estimate:
+            self.update_progress("Writing snapshot")
+            from snapshots import write_snapshot
+            write_snapshot(self.snapshot_path, self)
+            self.stats['snapshot'] = str(self.snapshot_path)
+
+        self.update_progress(stage, current_file_count, current_file_count)
+
+    def cancel(self, reason='cancelled'):
+        """Ask a running scan to stop; it returns promptly with partial results."""
+        self.token.cancel(reason)
+        self.notify_progress()
+
+    def _scan_files(self):
+        """Enumerate, analyze and record files; return the number processed."""
+        counter = None
+        if self.workers == 1:
+            # Count files in a quick first pass so progress has a fixed
+            # denominator, then stream them; holding the whole list would
+            # make peak memory grow with the tree
+            self.update_progress("Counting files")
+            self.update_progress("Analyzing files", 0, self.count_files())
+        else:
+            # Count in the background so the worker pool starts immediately;
+            # until the count is in, the total is unknown (None)
+            self.stats['progress']['total'] = None
+            counter = threading.Thread(target=self._count_in_background, name='count-files', daemon=True)
+            counter.start()
+            self.update_progress("Analyzing files", 0)
 
-        self.update_progress("Analyzing files", 0, len(files))
-        
         current_file_count = 0
-        for file_path in files:
-            if time.time() - self.start_time > self.MAX_TIME_SECONDS:
-                break
-                
-            current_file_count += 1
-            self.update_progress(
-                "Analyzing files",
-                current_file_count,
-                len(files),
-                str(file_path.relative_to(self.root_path))
-            )
-            
-            file_info = self.get_file_info(file_path)
-            self.stats['total_files'] += 1
-            self.stats['total_size'] += file_info['size']
-            
-            # Group by content type
-            content_type = file_info.get('type', 'unknown')
-            self.stats['content_groups'][content_type].append(file_info)
-            
-            # Track file types
-            self.stats['file_types'][content_type] = self.stats['file_types'].get(content_type, 0) + 1
-            
-            # Track largest files
-            self.stats['largest_files'].append(file_info)
-            self.stats['largest_files'].sort(key=lambda x: x['size'], reverse=True)
-            self.stats['largest_files'] = self.stats['largest_files'][:10]
-            
-            # Track newest files
-            self.stats['newest_files'].append(file_info)
-            self.stats['newest_files'].sort(key=lambda x: x['modified'], reverse=True)
-            self.stats['newest_files'] = self.stats['newest_files'][:10]
+        results = self.analyze_files(self.enumerate_files())
+        try:
+            for file_path, file_stat, file_info in results:
+                current_file_count += 1
+                # Files created since the count was taken push the total up
+                total = self.stats['progress']['total']
+                self.update_progress(
+                    "Analyzing files",
+                    current_file_count,
+                    current_file_count if total is not None and current_file_count > total else None,
+                    str(file_path.relative_to(self.root_path))
+                )
+
+                if file_info is not None:
+                    start = time.perf_counter()
+                    self.record_file(file_path, file_stat, file_info)
+                    self.metrics.observe('merge', time.perf_counter() - start)
+
+                if self.token.cancelled:
+                    break
+        except ScanCancelled:
+            pass
+        finally:
+            results.close()
+            if counter is not None:
+                # The count only lists directories, so it is done by now unless cancelled
+                counter.join()
+
+        return current_file_count
+
+    def _count_in_background(self):
+        """Publish the progress total once count_files() has it."""
+        total = self.count_files()
+        if not self.token.cancelled:
+            self.stats['progress']['total'] = max(total, self.stats['progress']['current'])
+            self.notify_progress()
+
+    def _estimate_files(self):
+        """Estimate the tree's totals from a sample (see TreeEstimator); return the number of files sampled.
+
+        Sampled files are recorded like scanned ones, so the samples and
+        largest/newest lists come from them, but totals, type counts and
+        content group sizes are replaced by the estimates.
+        """
+        self.update_progress("Estimating")
+        seconds = self.MAX_TIME_SECONDS if self.estimate_seconds is None else min(self.estimate_seconds, self.MAX_TIME_SECONDS)
+        from estimator import TreeEstimator
+        estimator = TreeEstimator(
+            self.root_path, self._sample_file, skip_dirs=self.skip_dirs,
+            project_indicators=self.project_indicators, token=self.token, metrics=self.metrics,
+            seed=self.ESTIMATE_SAMPLE_SEED, on_round=lambda summary: self._estimate_progress(estimator, summary)
+        )
+        start = time.perf_counter()
+        try:
+            summary = estimator.run(self.start_time + seconds)
+        except ScanCancelled:
+            summary = estimator.summary()
+        self.metrics.observe('estimate', time.perf_counter() - start)
+
+        for path, (file_stat, file_info) in sorted(estimator.samples.items()):
+            self.record_file(Path(path), file_stat, file_info)
+
+        self.stats['estimate'] = summary
+        self.stats['total_files'] = summary['files']['estimate']
+        self.stats['total_size'] = summary['size']['estimate']
+        self.stats['file_types'] = {entry['type']: entry['estimate'] for entry in summary['file_types']}
+        for content_type, group in self.stats['content_groups'].items():
+            group['count'] = self.stats['file_types'].get(content_type, group['count'])
+        # The root's own indicator files are authoritative; otherwise go by
+        # the ones found deeper in the tree if the rounds mostly agree
+        project = summary['project_type']
+        if self.stats['project_type'] == 'unknown' and project and \
+                project['confidence'] >= self.ESTIMATE_PROJECT_CONFIDENCE:
+            self.stats['project_type'] = project['type']
+        return len(estimator.samples)
 
+    def _sample_file(self, file_path, file_stat):
+        """Analyze one file picked by the estimator; None leaves it out, as a full scan would."""
+        if self.is_cloud_storage and file_stat.st_size > self.MAX_CLOUD_FILE_SIZE_MB * 1024 * 1024:
+            return None
+        cached = self._cache_lookup(file_path, file_stat)
+        if cached is not None:
+            return self._collect_result(file_path, file_stat, cached, False)[2]
+        return self._collect_result(file_path, file_stat, self.analyze_file(file_path), True)[2]
+
+    def _estimate_progress(self, estimator, summary):
+        """Publish the latest estimate so progress listeners see it refine."""
+        files = summary['files']
+        self.stats['progress']['estimate'] = {
+            key: summary[key] for key in ('rounds', 'exact', 'files', 'size', 'project_type')
+        }
+        margin = f" +-{files['margin']:.0f}" if files['margin'] is not None else ''
         self.update_progress(
-            "Analysis complete" if not self.stats['progress']['warnings'] else "Analysis completed with warnings",
-            len(files),
-            len(files)
+            f"Estimating: ~{files['estimate']}{margin} files after {summary['rounds']} rounds",
+            len(estimator.samples), len(estimator.samples)
         )
 
+    def start_live(self):
+        """Prepare a finished scan's results for apply_changes() (watch mode).
+
+        Watch mode keeps its own cancellation token (without the scan's time
+        limit), so cancel() stops a batch in progress and calling this again
+        resumes.
+        """
+        if self.estimate:
+            raise ValueError("Watch mode needs a full scan, not an estimate")
+        with self.live_lock:
+            self.token = CancellationToken(self._mp_context.Event() if self._mp_context else None)
+            if self._dependency_counts is None:
+                # Imports are edited on a copy, so the built graph stays consistent for readers
+                self._graph_edits = self.dependency_graph.copy()
+                self._dependency_counts = self._graph_edits.module_counts()
+                self.stats['live'] = {'since': time.time(), 'updates': 0, 'added': 0, 'modified': 0,
+                                      'removed': 0, 'last_update': None}
+
+    def apply_changes(self, paths=(), directories=()):
+        """Bring a finished scan's results up to date with changes on disk (watch mode).
+
+        paths are files that may have been created, modified or deleted, and
+        directories subtrees to reconcile as a whole (created, deleted or
+        moved directories, or the root after lost events). Everything named
+        is stat'ed and compared with its record, so a file is analyzed at
+        most once per call however many events it produced, and only if its
+        size or modification time changed. Totals, type counts, content
+        groups, top files, related groups and dependencies are updated in
+        place; the dependency graph and directory tree are rebuilt by
+        refresh_views() when next needed.
+
+        Call from one thread at a time; readers of the results hold
+        live_lock. Returns the numbers of added, modified and removed files,
+        or None if cancelled.
+        """
+        if self._dependency_counts is None:
+            self.start_live()
+        records = self.records
+        present = {}  # Relative path -> (path, stat) of regular files found
+        gone = set()
+
+        for directory in directories:
+            relative = self._relative_path(directory, is_dir=True)
+            if relative is None:
+                continue
+            top = self.root_path / relative
+            if top.is_dir() and not top.is_symlink():
+                for file_path, file_stat in self.iter_files(top):
+                    present[str(file_path.relative_to(self.root_path))] = (file_path, file_stat)
+            if self.token.cancelled:
+                return None
+            gone.update(index for index in records.within(relative) if records.path(index) not in present)
+
+        for path in paths:
+            relative = self._relative_path(path)
+            if relative is None or relative in present:
+                continue
+            try:
+                file_stat = os.lstat(path)
+            except OSError:
+                file_stat = None
+            if file_stat is not None and stat.S_ISREG(file_stat.st_mode):
+                present[relative] = (self.root_path / relative, file_stat)
+            else:
+                index = records.find(relative)
+                if index is not None:
+                    gone.add(index)
+
+        changed = []  # (path, stat, existing record index or None)
+        for relative, (file_path, file_stat) in present.items():
+            index = records.find(relative)
+            if self.is_cloud_storage and file_stat.st_size > self.MAX_CLOUD_FILE_SIZE_MB * 1024 * 1024:
+                # Never downloaded, as in the scan
+                if index is not None:
+                    gone.add(index)
+            elif index is None:
+                changed.append((file_path, file_stat, None))
+            elif records.sizes[index] != file_stat.st_size or records.mtimes[index] != file_stat.st_mtime_ns:
+                changed.append((file_path, file_stat, index))
+
+        # Analysis happens before taking the lock, so readers aren't held up by it
+        results = list(self.analyze_files((file_path, file_stat) for file_path, file_stat, _ in changed))
+        if self.token.cancelled:
+            return None
+        changed = [(index, file_path, file_stat, file_info)
+                   for (file_path, file_stat, index), (_, _, file_info) in zip(changed, results)
+                   if file_info is not None]
+        if not gone and not changed:
+            return {'added': 0, 'modified': 0, 'removed': 0}
+
+        with self.live_lock:
+            modified = {index for index, _, _, _ in changed if index is not None}
+            top = {-item[1] for item in self._largest_heap + self._newest_heap}
+            dropped_imports = self._graph_edits.discard(gone | modified)
+
+            regroup = False
+            for index in gone:
+                self._unrecord_file(index, dropped_imports.get(index, ()))
+                if not self._ungroup_related_file(self.root_path / records.path(index)):
+                    regroup = True
+                records.remove(index)
+            for index, file_path, file_stat, file_info in changed:
+                if index is not None:
+                    self._unrecord_file(index, dropped_imports.get(index, ()))
+                self.record_file(file_path, file_stat, file_info, index)
+
+            if regroup:
+                self._regroup_related_files()
+            if top & (gone | modified):
+                # A listed file went away or changed, so the runner-up isn't known
+                self._rebuild_top_files()
+            self._finalize_top_files()
+            records.version += 1
+            self._views_stale = True
+
+            summary = {'added': len(changed) - len(modified), 'modified': len(modified), 'removed': len(gone)}
+            live = self.stats['live']
+            live['updates'] += 1
+            live['last_update'] = time.time()
+            for key, count in summary.items():
+                live[key] += count
+        self.notify_progress()
+        return summary
+
+    def refresh_views(self):
+        """Rebuild the dependency graph and directory tree if watch mode changed the records."""
+        with self.live_lock:
+            if not self._views_stale:
+                return
+            # Built aside and swapped in, so a reader holding the old ones isn't disturbed
+            graph = self._graph_edits.copy()
+            graph.build(self.records)
+            tree = DirectoryTree()
+            tree.build(self.records)
+            self.dependency_graph, self.dir_tree = graph, tree
+            self.stats['dependency_graph'] = graph.summary()
+            self._views_stale = False
+
+    def _relative_path(self, path, is_dir=False):
+        """Path relative to the root, or None if outside it or in a skipped directory."""
+        try:
+            relative = str(Path(path).relative_to(self.root_path))
+        except ValueError:
+            return None
+        if relative == '.':
+            return ''
+        parts = relative.split(os.sep)
+        if self.skip_dirs.intersection(parts if is_dir else parts[:-1]):
+            return None
+        return relative
+
+    def _unrecord_file(self, index, dependencies):
+        """Take a record's contribution back out of the statistics."""
+        records = self.records
+        content_type = records.types[records.type_ids[index]]
+        self.stats['total_files'] -= 1
+        self.stats['total_size'] -= records.sizes[index]
+
+        for name in dependencies:
+            count = self._dependency_counts.get(name, 0) - 1
+            if count > 0:
+                self._dependency_counts[name] = count
+            else:
+                self._dependency_counts.pop(name, None)
+                self.stats['dependencies'].discard(name)
+
+        count = self.stats['file_types'].get(content_type, 0) - 1
+        if count > 0:
+            self.stats['file_types'][content_type] = count
+        else:
+            self.stats['file_types'].pop(content_type, None)
+
+        # The sample just shrinks; later files refill it
+        group = self.stats['content_groups'].get(content_type)
+        if group is not None:
+            group['count'] -= 1
+            path = records.path(index)
+            group['files'] = [file_info for file_info in group['files'] if file_info['path'] != path]
+            if group['count'] <= 0:
+                del self.stats['content_groups'][content_type]
+
+    def _ungroup_related_file(self, file_path):
+        """Drop a removed file from its related-file group; False if it heads a group."""
+        path = str(file_path)
+        related = self.stats['related_files']
+        if path in related:
+            return False
+        head = self.related_index.find(file_path.stem)
+        members = related.get(head) if head is not None else None
+        if members and path in members:
+            members.remove(path)
+        return True
+
+    def _regroup_related_files(self):
+        """Regroup every live file, after a group head was removed."""
+        self.related_index = RelatedFileIndex()
+        self.stats['related_files'] = defaultdict(list)
+        records = self.records
+        for index in records.live():
+            self.group_related_files(self.root_path / records.path(index), records.types[records.type_ids[index]])
+
+    def _rebuild_top_files(self):
+        """Refill the largest/newest heaps from every live record."""
+        live = list(self.records.live())
+        for heap, values in ((self._largest_heap, self.records.sizes), (self._newest_heap, self.records.mtimes)):
+            heap[:] = heapq.nlargest(self.TOP_FILES, ((values[index], -index) for index in live))
+            heapq.heapify(heap)
+
+    def to_dict(self):
+        """Scan results as plain JSON-ready data: raw byte counts and relative paths."""
+        def file_entry(index):
+            record = self.records.get(index)
+            return {
+                'path': record['path'],
+                'size': record['size'],
+                'modified': record['modified'].strftime('%Y-%m-%d %H:%M:%S')
+            }
+
+        return {
+            'root': str(self.root_path),
+            'project_type': self.stats['project_type'],
+            'total_files': self.stats['total_files'],
+            'total_size': self.stats['total_size'],
+            'file_types': dict(sorted(self.stats['file_types'].items(), key=lambda x: x[1], reverse=True)),
+            'content_groups': {
+                content_type: {
+                    'count': group['count'],
+                    'samples': [file['path'] for file in group['files']]
+                }
+                for content_type, group in self.stats['content_groups'].items()
+            },
+            'largest_files': [file_entry(index) for index in self.stats['largest_files']],
+            'newest_files': [file_entry(index) for index in self.stats['newest_files']],
+            'directories': self.dir_tree.node(0, depth=1, limit=10)['children'] if self.dir_tree.built else None,
+            'dependencies': sorted(self.stats['dependencies']),
+            'dependency_graph': self.stats['dependency_graph'],
+            'duplicates': self.stats['duplicates'],
+            'estimate': self.stats['estimate'],
+            'snapshot': self.stats['snapshot'],
+            'partial': self.stats['partial'],
+            'truncated': self.stats['truncated'],
+            'live': self.stats['live'],
+            'cache': self.stats['cache'],
+            'classifier': self.stats['classifier'],
+            'metrics': self.stats['metrics'],
+            'warnings': self.stats['progress']['warnings']
+        }
+
     def human_size(self, size):
         """Convert size in bytes to human readable format."""
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -337,34 +1238,207 @@ class FolderAnalyzer:
 
     def display_results(self):
         """Display analysis results in a formatted way."""
+        estimate = self.stats['estimate']
         print("\nProject Overview")
         print(f"Project Type: {self.stats['project_type']}")
-        print(f"Total Files: {self.stats['total_files']}")
-        print(f"Total Size: {self.human_size(self.stats['total_size'])}")
+        if estimate is not None:
+            files, size = estimate['files'], estimate['size']
+            exact = 'exact, the whole tree was sampled' if estimate['exact'] else '95% confidence'
+            print(f"Estimated from {estimate['files_sampled']} sampled files in {estimate['rounds']} rounds ({exact})")
+            if files['low'] is not None:
+                print(f"Total Files: ~{files['estimate']} ({files['low']} - {files['high']})")
+                print(f"Total Size: ~{self.human_size(size['estimate'])} "
+                      f"({self.human_size(size['low'])} - {self.human_size(size['high'])})")
+            else:
+                print(f"Total Files: ~{files['estimate']}")
+                print(f"Total Size: ~{self.human_size(size['estimate'])}")
+        else:
+            print(f"Total Files: {self.stats['total_files']}")
+            print(f"Total Size: {self.human_size(self.stats['total_size'])}")
+        if self.stats['truncated']:
+            print(f"Partial: stopped at the {self.stats['truncated'].replace('_', ' ')} limit")
 
         print("\nFile Types Distribution:")
-        for file_type, count in sorted(self.stats['file_types'].items(), key=lambda x: x[1], reverse=True):
-            print(f"{file_type}: {count}")
+        if estimate is not None:
+            for entry in estimate['file_types']:
+                interval = f" ({entry['low']} - {entry['high']})" if entry['low'] is not None else ''
+                print(f"{entry['type']}: ~{entry['estimate']}{interval}")
+        else:
+            for file_type, count in sorted(self.stats['file_types'].items(), key=lambda x: x[1], reverse=True):
+                print(f"{file_type}: {count}")
+
+        print("\nLargest Files:" if estimate is None else "\nLargest Sampled Files:")
+        for index in self.stats['largest_files']:
+            file = self.records.get(index)
+            print(f"{self.human_size(file['size'])}: {file['path']}")
 
-        print("\nLargest Files:")
-        for file in self.stats['largest_files']:
-            print(f"{file['size_human']}: {file['path']}")
+        if self.dir_tree.built and len(self.dir_tree) > 1:
+            print("\nLargest Directories:")
+            for directory in self.dir_tree.node(0, depth=1, limit=10)['children']:
+                print(f"{self.human_size(directory['size'])}: {directory['path']} ({directory['files']} files)")
 
-        print("\nMost Recent Files:")
-        for file in self.stats['newest_files']:
+        print("\nMost Recent Files:" if estimate is None else "\nMost Recent Sampled Files:")
+        for index in self.stats['newest_files']:
+            file = self.records.get(index)
             print(f"{file['modified'].strftime('%Y-%m-%d %H:%M:%S')}: {file['path']}")
 
+        classifier = self.stats['classifier']
+        if classifier['type'] or classifier['encoding']:
+            print("\nClassifier Tiers:")
+            for kind in ('type', 'encoding'):
+                if classifier[kind]:
+                    tiers = ', '.join(f"{tier}: {count}" for tier, count in sorted(classifier[kind].items()))
+                    print(f"{kind.capitalize()}: {tiers}")
+
+        graph = self.stats['dependency_graph']
+        if graph and graph['edges']:
+            print("\nDependency Graph:")
+            print(f"Files with imports: {graph['files_with_imports']}, Modules: {graph['modules']}, "
+                  f"Edges: {graph['edges']} ({graph['in_tree_edges']} in-tree), Import cycles: {graph['cycles']}")
+            print("Most imported:")
+            for node in graph['top_fan_in']:
+                print(f"  {node['importers']}: {node['name']}")
+            for cycle in self.dependency_graph.cycles(limit=5):
+                print(f"Import cycle: {', '.join(cycle)}")
+
+        duplicates = self.stats['duplicates']
+        if duplicates and duplicates['group_count']:
+            print("\nDuplicate Files:")
+            print(f"{duplicates['duplicate_files']} redundant copies in {duplicates['group_count']} groups, "
+                  f"{self.human_size(duplicates['wasted_bytes'])} wasted")
+            for group in duplicates['groups'][:10]:
+                print(f"{self.human_size(group['wasted_bytes'])} wasted, {group['count']} x "
+                      f"{self.human_size(group['size'])}: {', '.join(group['paths'][:3])}"
+                      + (' ...' if group['count'] > 3 else ''))
+        if duplicates and duplicates['hard_links']['group_count']:
+            links = duplicates['hard_links']
+            print(f"\nHard links (not counted as wasted): {links['linked_files']} extra links "
+                  f"to {links['group_count']} files")
+            for group in links['groups'][:10]:
+                print(f"{group['count']} x {self.human_size(group['size'])}: {', '.join(group['paths'][:3])}"
+                      + (' ...' if group['count'] > 3 else ''))
+
+        if self.stats['cache'] is not None:
+            cache = self.stats['cache']
+            print("\nScan Cache:")
+            print(f"Hits: {cache['hits']}, Misses: {cache['misses']}, Evicted: {cache['evicted']}")
+
+        metrics = self.stats['metrics'] or self.metrics.summary()
+        if metrics['stages']:
+            print("\nStage Timings:")
+            for stage, timing in sorted(metrics['stages'].items(), key=lambda x: x[1]['total'], reverse=True):
+                print(f"{stage}: {timing['total']:.3f}s total, {timing['count']} calls, "
+                      f"{timing['mean'] * 1000:.2f}ms mean, {timing['max'] * 1000:.2f}ms max")
+            counters = ', '.join(f"{name}: {value}" for name, value in sorted(metrics['counters'].items()))
+            print(f"I/O: {counters}")
+
+        if metrics.get('slowest_files'):
+            print("\nSlowest Files:")
+            for file in metrics['slowest_files']:
+                breakdown = ', '.join(f"{stage} {seconds * 1000:.1f}ms" for stage, seconds in file['stages'].items())
+                print(f"{file['seconds'] * 1000:.1f}ms: {file['path']} ({breakdown})")
+
+        if self.stats['profile']:
+            print("\nProfile:")
+            print(self.stats['profile'])
+
+# Per-process analyzer used by the 'process' worker backend
+_worker_analyzer = None
+
+def _init_worker(root_path, options, cancel_event, deadline):
+    """Create the analyzer used by a worker process."""
+    global _worker_analyzer
+    _worker_analyzer = FolderAnalyzer(root_path, **options)
+    _worker_analyzer.token = CancellationToken(cancel_event, deadline)
+
+def _analyze_in_worker(file_path):
+    """Analyze a single file inside a worker process."""
+    return _worker_analyzer.analyze_file(file_path)
+
 def main():
-    folder_path = input("Enter the folder path to analyze (press Enter for current folder): ").strip()
-    if not folder_path:
-        folder_path = "."
-    
+    """Command-line entry point: analyze a folder and print the results."""
+    import argparse
+    import signal
+
+    parser = argparse.ArgumentParser(description='Analyze the files in a folder.')
+    parser.add_argument('folder', nargs='?', default='.', help='Folder to analyze (default: current folder)')
+    parser.add_argument('--metadata-only', action='store_true',
+                        help='Only stat files; skip content analysis, libmagic and encoding detection')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    parser.add_argument('--workers', type=int, default=1, help='Files analyzed in parallel')
+    parser.add_argument('--backend', choices=FolderAnalyzer.WORKER_BACKENDS, default='thread')
+    parser.add_argument('--classify-mode', choices=('fast', 'accurate'), default='fast')
+    parser.add_argument('--cache', metavar='PATH', help='Reuse per-file results from this scan cache')
+    parser.add_argument('--hashes', action='store_true', help='Hash the content of every file')
+    parser.add_argument('--duplicates', action='store_true', help='Find files with identical content')
+    parser.add_argument('--snapshot', metavar='PATH', help='Write a snapshot for later diffs (see snapshots.py)')
+    parser.add_argument('--estimate', action='store_true', help='Estimate totals from a sample of the tree')
+    parser.add_argument('--estimate-seconds', type=float, help='Time budget for refining an estimate')
+    parser.add_argument('--profile', action='store_true', help='Include a cProfile report')
+    parser.add_argument('--watch', action='store_true',
+                        help='After the scan, keep the results current and report changes until Ctrl-C')
+    parser.add_argument('--poll', type=float, metavar='SECONDS', help='Watch by polling instead of inotify')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.folder):
+        parser.exit(2, f"Error: not a folder: {args.folder}\n")
+    if args.watch and args.estimate:
+        parser.exit(2, "Error: --watch needs a full scan, not --estimate\n")
+
+    try:
+        analyzer = FolderAnalyzer(
+            args.folder, metadata_only=args.metadata_only, workers=args.workers, backend=args.backend,
+            cache_path=args.cache, classify_mode=args.classify_mode, profile=args.profile,
+            content_hashes=args.hashes, snapshot_path=args.snapshot, find_duplicates=args.duplicates,
+            estimate=args.estimate, estimate_seconds=args.estimate_seconds
+        )
+    except ValueError as e:
+        parser.exit(2, f"Error: {e}\n")
+
+    def interrupt(signum, frame):
+        # The first Ctrl-C stops the scan with partial results; a second one exits
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        analyzer.cancel()
+
+    signal.signal(signal.SIGINT, interrupt)
     try:
-        analyzer = FolderAnalyzer(folder_path)
         analyzer.scan()
-        analyzer.display_results()
+    except KeyboardInterrupt:
+        sys.exit(130)
     except Exception as e:
-        print(f"Error: {str(e)}")
+        print(f"Error: {str(e)}", file=sys.stderr)
+        sys.exit(1)
+
+    if args.json:
+        json.dump(analyzer.to_dict(), sys.stdout, indent=2, default=str)
+        print()
+    else:
+        analyzer.display_results()
+        for warning in analyzer.stats['progress']['warnings']:
+            print(f"Warning: {warning}", file=sys.stderr)
+
+    if args.watch and not analyzer.stats['progress']['cancelled']:
+        from watcher import FolderWatcher
+
+        def report(summary):
+            totals = {'total_files': analyzer.stats['total_files'], 'total_size': analyzer.stats['total_size']}
+            if args.json:
+                print(json.dumps(dict(summary, time=time.time(), **totals)), flush=True)
+            else:
+                print(f"{datetime.now().strftime('%H:%M:%S')} +{summary['added']} ~{summary['modified']} "
+                      f"-{summary['removed']}: {totals['total_files']} files, "
+                      f"{analyzer.human_size(totals['total_size'])}", flush=True)
+
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        watcher = FolderWatcher(analyzer, polling=args.poll is not None, poll_seconds=args.poll, on_update=report)
+        watcher.start()
+        print(f"Watching {args.folder} ({watcher.mode}); Ctrl-C to stop", file=sys.stderr)
+        try:
+            while watcher.running:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            watcher.stop()
+    sys.exit(3 if analyzer.stats['partial'] else 0)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
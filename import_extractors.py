@@ -0,0 +1,187 @@
+import io
+import re
+
+# Python: statements that can only be imports. The header scan reads these
+# line by line; anything import-like after the header sends the file to ast.
+# A statement starts a line or follows ':' (a one-line 'if x: import y') or ';'.
+PY_IMPORT = re.compile(r'import\s+(.+)')
+PY_FROM = re.compile(r'from\s+(\.*)([\w.]*)\s+import\b(.*)')
+PY_LATE_IMPORT = re.compile(
+    r'(?:^|[:;])[ \t]*(?:import[ \t]+[\w.]|from[ \t]+[.\w]+[ \t]+import\b)', re.MULTILINE
+)
+PY_STRING_PREFIX = re.compile(r'[rRuUbBfF]{0,2}(\'\'\'|"""|\'|")')
+
+# JavaScript/TypeScript: static imports, re-exports, require() and import()
+JS_IMPORT = re.compile(
+    r'''(?:\bimport\s+(?:[\w*{}\s,$]+?\s+from\s+)?'''
+    r'''|\bexport\s+[\w*{}\s,$]+?\s+from\s+'''
+    r'''|\b(?:require|import)\s*\(\s*)'''
+    r'''['"]([^'"\n]+)['"]'''
+)
+JAVA_IMPORT = re.compile(r'^[ \t]*import[ \t]+(?:static[ \t]+)?([\w.]+?)(?:\.\*)?[ \t]*;', re.MULTILINE)
+C_INCLUDE = re.compile(r'^[ \t]*#[ \t]*include[ \t]*[<"]([^>"\n]+)[>"]', re.MULTILINE)
+GO_IMPORT = re.compile(r'^import[ \t]+(?:[\w.]+[ \t]+)?"([^"\n]+)"', re.MULTILINE)
+GO_IMPORT_BLOCK = re.compile(r'^import[ \t]*\(([^)]*)\)', re.MULTILINE)
+GO_IMPORT_SPEC = re.compile(r'"([^"\n]+)"')
+RUST_USE = re.compile(
+    r'^[ \t]*(?:pub(?:\([^)\n]*\))?[ \t]+)?(?:use[ \t]+(?:::)?|extern[ \t]+crate[ \t]+)([\w:]+)',
+    re.MULTILINE
+)
+RUST_LOCAL_ROOTS = ('crate', 'self', 'super')
+
+
+def python_imports(content, counters=None):
+    """Modules imported by Python source.
+
+    The leading block of imports, comments and the module docstring is read
+    line by line and the scan stops at the first other statement. Only if an
+    import-like line appears further down (a nested or conditional import,
+    or a string that looks like one) is the whole file parsed with ast.
+    Relative imports keep their leading dots ('.utils', '..models.user');
+    'from . import a' reports '.a'.
+    """
+    deps = set()
+    lines = io.StringIO(content)
+    header_end = 0
+    seen_statement = False
+
+    for line in lines:
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            header_end += len(line)
+            continue
+
+        quote = PY_STRING_PREFIX.match(stripped)
+        if quote and not seen_statement:
+            # Module docstring
+            seen_statement = True
+            delimiter = quote.group(1)
+            rest = stripped[quote.end():]
+            if len(delimiter) == 3 and delimiter not in rest:
+                for line_part in lines:
+                    line += line_part
+                    if delimiter in line_part:
+                        break
+            header_end += len(line)
+            continue
+
+        match = PY_IMPORT.match(stripped) or PY_FROM.match(stripped)
+        if not match or ';' in stripped:
+            break
+        seen_statement = True
+
+        # Continuation lines belong to this statement
+        while stripped.endswith('\\') or stripped.count('(') > stripped.count(')'):
+            next_line = lines.readline()
+            if not next_line:
+                break
+            line += next_line
+            stripped = stripped.rstrip('\\') + ' ' + next_line.strip()
+
+        if match.re is PY_IMPORT:
+            deps.update(_import_names(match.group(1)))
+        elif match.group(2):
+            deps.add(match.group(1) + match.group(2))
+        else:
+            # 'from . import a, b': the names may be submodules
+            names = PY_FROM.match(stripped).group(3)
+            deps.update(match.group(1) + name for name in _import_names(names))
+        header_end += len(line)
+
+    if PY_LATE_IMPORT.search(content, header_end):
+        if counters is not None:
+            counters['import_ast_fallbacks'] = counters.get('import_ast_fallbacks', 0) + 1
+        try:
+            return python_imports_ast(content)
+        except (SyntaxError, ValueError):
+            # Not valid Python: keep what the header scan found
+            pass
+    return deps
+
+
+def _import_names(names):
+    """Imported names from the text after 'import', without aliases."""
+    names = names.split('#', 1)[0].replace('\\', ' ').replace('(', ' ').replace(')', ' ')
+    return [name.split()[0] for name in names.split(',') if name.strip()]
+
+
+def python_imports_ast(content):
+    """Modules imported anywhere in Python source, via a full parse."""
+    import ast  # Only needed for the few files the header scan can't settle
+    deps = set()
+    for node in ast.walk(ast.parse(content)):
+        if isinstance(node, ast.Import):
+            deps.update(name.name for name in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            dots = '.' * node.level
+            if node.module:
+                deps.add(dots + node.module)
+            elif dots:
+                deps.update(dots + name.name for name in node.names)
+    return deps
+
+
+def js_imports(content, counters=None):
+    """Modules imported, re-exported or required by JavaScript/TypeScript source."""
+    return set(JS_IMPORT.findall(content))
+
+
+def java_imports(content, counters=None):
+    """Classes and packages imported by Java source."""
+    return set(JAVA_IMPORT.findall(content))
+
+
+def c_includes(content, counters=None):
+    """Headers included by C/C++ source."""
+    return set(C_INCLUDE.findall(content))
+
+
+def go_imports(content, counters=None):
+    """Packages imported by Go source."""
+    deps = set(GO_IMPORT.findall(content))
+    for block in GO_IMPORT_BLOCK.findall(content):
+        deps.update(GO_IMPORT_SPEC.findall(block))
+    return deps
+
+
+def rust_uses(content, counters=None):
+    """Crates and paths brought in by Rust use and extern crate items."""
+    deps = set()
+    for path in RUST_USE.findall(content):
+        path = path.rstrip(':')
+        if path and path.split('::', 1)[0] not in RUST_LOCAL_ROOTS:
+            deps.add(path)
+    return deps
+
+
+# Extractor for each source file suffix
+EXTRACTORS = {
+    '.py': python_imports,
+    '.pyw': python_imports,
+    '.pyi': python_imports,
+    '.js': js_imports,
+    '.mjs': js_imports,
+    '.cjs': js_imports,
+    '.jsx': js_imports,
+    '.ts': js_imports,
+    '.tsx': js_imports,
+    '.java': java_imports,
+    '.c': c_includes,
+    '.h': c_includes,
+    '.cc': c_includes,
+    '.cpp': c_includes,
+    '.cxx': c_includes,
+    '.hh': c_includes,
+    '.hpp': c_includes,
+    '.hxx': c_includes,
+    '.go': go_imports,
+    '.rs': rust_uses,
+}
+
+
+def extract_imports(suffix, content, counters=None):
+    """Dependencies of a source file, chosen by its (lowercase) suffix."""
+    extractor = EXTRACTORS.get(suffix)
+    if extractor is None:
+        return set()
+    return extractor(content, counters)
@@ -0,0 +1,124 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class AnalysisJob:
+    """A folder analysis queued or running on the background executor."""
+
+    def __init__(self, folder_path, analyzer):
+        self.id = uuid.uuid4().hex
+        self.folder_path = folder_path
+        self.analyzer = analyzer
+        self.status = 'queued'  # queued, running, completed, failed, cancelled
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.future = None
+        self.cancel_requested = False
+
+    @property
+    def finished(self):
+        return self.status in ('completed', 'failed', 'cancelled')
+
+    def to_dict(self):
+        """Job status summary for the API."""
+        return {
+            'id': self.id,
+            'path': self.folder_path,
+            'status': self.status,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobManager:
+    """Runs analyzer scans on a bounded thread pool and tracks them by job ID."""
+
+    def __init__(self, max_concurrent=2, max_finished=50, on_discard=None):
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='analysis')
+        self.max_finished = max_finished
+        self.on_discard = on_discard  # Called with each pruned job, to release its stored results
+        self.jobs = OrderedDict()
+        self.lock = threading.Lock()
+
+    def submit(self, folder_path, analyzer, on_success=None):
+        """Queue a scan and return its job immediately."""
+        job = AnalysisJob(folder_path, analyzer)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._prune()
+        job.future = self.executor.submit(self._run, job, on_success)
+        return job
+
+    def get(self, job_id):
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def latest(self):
+        """Most recently submitted job, or None."""
+        with self.lock:
+            return next(reversed(self.jobs.values()), None)
+
+    def all(self):
+        """All known jobs, oldest first."""
+        with self.lock:
+            return list(self.jobs.values())
+
+    def list(self):
+        with self.lock:
+            return [job.to_dict() for job in reversed(self.jobs.values())]
+
+    def cancel(self, job_id):
+        """Cancel a job; returns False if it has already finished.
+
+        A queued job is dropped; a running scan is asked to stop and its
+        partial results are kept.
+        """
+        job = self.get(job_id)
+        if job is None or job.finished:
+            return False
+        job.cancel_requested = True
+        if job.future.cancel():
+            job.status = 'cancelled'
+            job.finished_at = time.time()
+            job.analyzer.notify_progress()
+        else:
+            job.analyzer.cancel()
+        return True
+
+    def _run(self, job, on_success):
+        if job.status == 'cancelled':
+            return
+        job.status = 'running'
+        job.started_at = time.time()
+        try:
+            job.analyzer.scan()
+            job.result = job.analyzer.display_results()
+            if job.cancel_requested:
+                job.status = 'cancelled'
+                return
+            job.status = 'completed'
+            if on_success is not None:
+                on_success(job)
+        except Exception as e:
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            # Status changes aren't progress updates, so wake up progress streams explicitly
+            job.analyzer.notify_progress()
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond max_finished."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            job = self.jobs.pop(job_id)
+            if self.on_discard is not None:
+                self.on_discard(job)
@@ -0,0 +1,161 @@
+import heapq
+import io
+import threading
+from bisect import bisect_left
+
+
+class ScanMetrics:
+    """Hot-path instrumentation for a scan.
+
+    Per-stage timings are accumulated into totals and fixed-bucket
+    histograms, I/O counters are summed, and the slowest files are kept
+    with their per-stage breakdown. Per-file timings are measured wherever
+    the file is analyzed (including worker processes) and merged here from
+    the main thread.
+    """
+
+    # Histogram bucket upper bounds, in seconds
+    BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+    SLOWEST_FILES = 10
+
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self._slowest = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        """Record one timed occurrence of a stage."""
+        with self._lock:
+            entry = self.stages.get(stage)
+            if entry is None:
+                entry = self.stages[stage] = {
+                    'count': 0, 'total': 0.0, 'max': 0.0, 'buckets': [0] * (len(self.BUCKETS) + 1)
+                }
+            entry['count'] += 1
+            entry['total'] += seconds
+            if seconds > entry['max']:
+                entry['max'] = seconds
+            entry['buckets'][bisect_left(self.BUCKETS, seconds)] += 1
+
+    def add(self, counter, amount=1):
+        """Increment an I/O or event counter."""
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def record_file(self, path, file_metrics):
+        """Merge the timings and counters measured while analyzing one file."""
+        stages = file_metrics.get('stages', {})
+        for stage, seconds in stages.items():
+            self.observe(stage, seconds)
+        for counter, amount in file_metrics.get('counters', {}).items():
+            self.add(counter, amount)
+
+        total = sum(stages.values())
+        with self._lock:
+            self._seq += 1
+            item = (total, -self._seq, path, stages)
+            if len(self._slowest) < self.SLOWEST_FILES:
+                heapq.heappush(self._slowest, item)
+            elif item[:2] > self._slowest[0][:2]:
+                heapq.heapreplace(self._slowest, item)
+
+    def slowest_files(self):
+        """Slowest files first, with their per-stage breakdown."""
+        with self._lock:
+            items = sorted(self._slowest, key=lambda x: x[:2], reverse=True)
+        return [
+            {'path': path, 'seconds': total, 'stages': dict(stages)}
+            for total, _, path, stages in items
+        ]
+
+    def summary(self, include_slowest=True):
+        """Plain-dict view of the metrics for JSON output."""
+        with self._lock:
+            stages = {
+                stage: {
+                    'count': entry['count'],
+                    'total': entry['total'],
+                    'max': entry['max'],
+                    'mean': entry['total'] / entry['count'] if entry['count'] else 0
+                }
+                for stage, entry in self.stages.items()
+            }
+            counters = dict(self.counters)
+        summary = {'stages': stages, 'counters': counters}
+        if include_slowest:
+            summary['slowest_files'] = self.slowest_files()
+        return summary
+
+    def histograms(self):
+        """Copy of the per-stage histograms: {stage: (buckets, total, count)}."""
+        with self._lock:
+            return {
+                stage: (list(entry['buckets']), entry['total'], entry['count'])
+                for stage, entry in self.stages.items()
+            }
+
+
+class ScanProfiler:
+    """Optional cProfile capture of a scan's main thread."""
+
+    TOP_FUNCTIONS = 25
+
+    def __init__(self):
+        import cProfile
+        self.profile = cProfile.Profile()
+
+    def __enter__(self):
+        self.profile.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profile.disable()
+        return False
+
+    def report(self):
+        """Top functions by cumulative time, as text."""
+        import pstats
+        output = io.StringIO()
+        pstats.Stats(self.profile, stream=output).sort_stats('cumulative').print_stats(self.TOP_FUNCTIONS)
+        return output.getvalue()
+
+
+def _format_labels(labels):
+    return ','.join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(metrics_by_labels, prefix='folder_analyzer'):
+    """Render ScanMetrics in the Prometheus text exposition format.
+
+    metrics_by_labels is a list of (labels, ScanMetrics) pairs, typically
+    one per analysis job.
+    """
+    lines = []
+
+    lines.append(f"# HELP {prefix}_stage_seconds Time spent per file in each scan stage.")
+    lines.append(f"# TYPE {prefix}_stage_seconds histogram")
+    for labels, metrics in metrics_by_labels:
+        for stage, (buckets, total, count) in sorted(metrics.histograms().items()):
+            stage_labels = dict(labels, stage=stage)
+            cumulative = 0
+            for bound, bucket_count in zip(ScanMetrics.BUCKETS + ('+Inf',), buckets):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(dict(stage_labels, le=bound))
+                lines.append(f"{prefix}_stage_seconds_bucket{{{bucket_labels}}} {cumulative}")
+            lines.append(f"{prefix}_stage_seconds_sum{{{_format_labels(stage_labels)}}} {total}")
+            lines.append(f"{prefix}_stage_seconds_count{{{_format_labels(stage_labels)}}} {count}")
+
+    counter_names = sorted({name for _, metrics in metrics_by_labels for name in metrics.counters})
+    for name in counter_names:
+        lines.append(f"# TYPE {prefix}_{name}_total counter")
+        for labels, metrics in metrics_by_labels:
+            if name in metrics.counters:
+                lines.append(f"{prefix}_{name}_total{{{_format_labels(labels)}}} {metrics.counters[name]}")
+
+    return '\n'.join(lines) + '\n'
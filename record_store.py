@@ -0,0 +1,140 @@
+import os
+import sys
+from array import array
+from datetime import datetime
+
+
+class FileRecordStore:
+    """Compact columnar store of per-file scan records.
+
+    Each file costs a few machine words in typed arrays plus its name string.
+    Directory paths and MIME types are interned and referenced by index,
+    timestamps are kept as integer nanoseconds, and nothing is formatted
+    until a record is rendered with get().
+
+    Records are only appended during a scan. Watch mode also rewrites a
+    changed file's record in place with update() and tombstones deleted
+    files with remove(): their indices stay in the arrays (so indices held
+    elsewhere stay valid) and are listed in deleted, which anything
+    iterating over all records skips.
+    """
+
+    def __init__(self):
+        self.dirs = []  # Interned relative directory paths
+        self.types = []  # Interned MIME types
+        self._dir_ids = {}
+        self._type_ids = {}
+
+        self.names = []
+        self.dir_ids = array('I')
+        self.type_ids = array('I')
+        self.sizes = array('q')
+        self.mtimes = array('q')  # st_mtime_ns
+        self.ctimes = array('q')  # st_ctime_ns
+        self.devices = array('Q')  # st_dev and st_ino, so hard links to one file can be told apart
+        self.inodes = array('Q')
+        self.hashes = {}  # Index -> content hash, for files that were hashed
+        self.deleted = set()  # Indices of removed records
+        self.version = 0  # Bumped whenever records change after the scan
+        self._lookup = None  # Dir id -> {name: index} of live records, built on first find()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _intern(self, value, values, ids):
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    def dir_id(self, directory):
+        """Index of an interned directory path."""
+        return self._intern(directory, self.dirs, self._dir_ids)
+
+    def type_id(self, mime_type):
+        """Index of an interned MIME type."""
+        return self._intern(mime_type, self.types, self._type_ids)
+
+    def append(self, relative_path, size, mtime_ns, ctime_ns, mime_type, device=0, inode=0):
+        """Add a file record and return its index; inode 0 means unknown."""
+        directory, name = os.path.split(relative_path)
+        self.names.append(sys.intern(name))
+        self.dir_ids.append(self.dir_id(directory))
+        self.type_ids.append(self.type_id(mime_type or 'unknown'))
+        self.sizes.append(size)
+        self.mtimes.append(mtime_ns)
+        self.ctimes.append(ctime_ns)
+        self.devices.append(device)
+        self.inodes.append(inode)
+        index = len(self.names) - 1
+        if self._lookup is not None:
+            self._lookup.setdefault(self.dir_ids[index], {})[self.names[index]] = index
+        return index
+
+    def update(self, index, size, mtime_ns, ctime_ns, mime_type, device=0, inode=0):
+        """Rewrite the metadata of an existing record."""
+        self.type_ids[index] = self.type_id(mime_type or 'unknown')
+        self.sizes[index] = size
+        self.mtimes[index] = mtime_ns
+        self.ctimes[index] = ctime_ns
+        self.devices[index] = device
+        self.inodes[index] = inode
+        self.hashes.pop(index, None)
+        self.version += 1
+
+    def remove(self, index):
+        """Tombstone a record."""
+        self.deleted.add(index)
+        self.hashes.pop(index, None)
+        self.version += 1
+        names = self._lookup.get(self.dir_ids[index]) if self._lookup is not None else None
+        if names is not None and names.get(self.names[index]) == index:
+            del names[self.names[index]]
+
+    def live(self):
+        """Indices of the records that have not been removed."""
+        if not self.deleted:
+            return range(len(self.names))
+        return (index for index in range(len(self.names)) if index not in self.deleted)
+
+    def _lookup_table(self):
+        if self._lookup is None:
+            lookup = {}
+            for index in self.live():
+                lookup.setdefault(self.dir_ids[index], {})[self.names[index]] = index
+            self._lookup = lookup
+        return self._lookup
+
+    def find(self, relative_path):
+        """Index of the live record for a relative path, or None."""
+        directory, name = os.path.split(relative_path)
+        dir_id = self._dir_ids.get(directory)
+        if dir_id is None:
+            return None
+        return self._lookup_table().get(dir_id, {}).get(name)
+
+    def within(self, directory):
+        """Indices of the live records in a directory and its subdirectories."""
+        prefix = directory + os.sep
+        indices = []
+        for dir_id, names in self._lookup_table().items():
+            path = self.dirs[dir_id]
+            if not directory or path == directory or path.startswith(prefix):
+                indices.extend(names.values())
+        return indices
+
+    def path(self, index):
+        """Relative path of a record."""
+        directory = self.dirs[self.dir_ids[index]]
+        return os.path.join(directory, self.names[index]) if directory else self.names[index]
+
+    def get(self, index):
+        """Render a record as a file info dict."""
+        return {
+            'path': self.path(index),
+            'size': self.sizes[index],
+            'created': datetime.fromtimestamp(self.ctimes[index] / 1e9),
+            'modified': datetime.fromtimestamp(self.mtimes[index] / 1e9),
+            'type': self.types[self.type_ids[index]]
+        }
@@ -0,0 +1,82 @@
+class RelatedFileIndex:
+    """Index of related-file group heads for near-linear grouping.
+
+    A file joins the earliest group whose head stem contains its stem or is
+    contained in it (for stems longer than MIN_STEM_LENGTH characters);
+    otherwise it becomes a new head. Rather than comparing against every
+    head, both directions are answered from indexes:
+
+    - heads contained in the new stem: every substring of the stem is looked
+      up in a stem -> first head map (only lengths some head actually has);
+    - heads containing the new stem: each head's character n-grams are
+      indexed, and only heads listed under the stem's rarest n-gram are
+      checked with a real substring test.
+    """
+
+    MIN_STEM_LENGTH = 3  # Stems this short never join a group
+    GRAM = 4  # n-gram length; must not exceed MIN_STEM_LENGTH + 1
+
+    def __init__(self):
+        self.heads = []  # Head paths, in creation order
+        self.head_stems = []
+        self._first_by_stem = {}
+        self._stem_lengths = {}  # Length -> number of heads with a stem of that length
+        self._grams = {}  # n-gram -> ascending list of head indices
+
+    def __len__(self):
+        return len(self.heads)
+
+    def find(self, stem):
+        """Return the path of the group head a stem belongs to, or None."""
+        if len(stem) <= self.MIN_STEM_LENGTH:
+            return None
+
+        best = self._find_contained(stem)
+        best = self._find_containing(stem, best)
+        return self.heads[best] if best is not None else None
+
+    def add(self, path, stem):
+        """Register a new group head."""
+        index = len(self.heads)
+        self.heads.append(path)
+        self.head_stems.append(stem)
+        self._first_by_stem.setdefault(stem, index)
+        self._stem_lengths[len(stem)] = self._stem_lengths.get(len(stem), 0) + 1
+
+        # Heads shorter than an n-gram can't contain a stem long enough to join a group
+        for gram in {stem[i:i + self.GRAM] for i in range(len(stem) - self.GRAM + 1)}:
+            postings = self._grams.get(gram)
+            if postings is None:
+                self._grams[gram] = [index]
+            else:
+                postings.append(index)
+
+    def _find_contained(self, stem):
+        """Earliest head whose stem is a substring of stem."""
+        stem_length = len(stem)
+        substrings = [
+            stem[start:start + length]
+            for length in self._stem_lengths if length <= stem_length
+            for start in range(stem_length - length + 1)
+        ]
+        hits = [index for index in map(self._first_by_stem.get, substrings) if index is not None]
+        return min(hits) if hits else None
+
+    def _find_containing(self, stem, best):
+        """Earliest head whose stem contains stem, if earlier than best."""
+        postings = None
+        for i in range(len(stem) - self.GRAM + 1):
+            candidates = self._grams.get(stem[i:i + self.GRAM])
+            if candidates is None:
+                # Some n-gram of the stem appears in no head, so no head contains it
+                return best
+            if postings is None or len(candidates) < len(postings):
+                postings = candidates
+
+        head_stems = self.head_stems
+        for index in postings:
+            if best is not None and index >= best:
+                break
+            if stem in head_stems[index]:
+                return index
+        return best
@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import time
+
+
+class ScanCache:
+    """Persistent cache of per-file analysis results, stored in SQLite.
+
+    Entries are keyed by absolute path and variant (the settings that shape
+    a result, such as classifier mode and content hashes) and validated
+    against the file's size, mtime_ns and inode, so unchanged files are never
+    re-read. Paths are stored as their raw file system bytes, so names that
+    aren't valid UTF-8 are cached like any other. Results of different
+    variants live side by side; the whole cache is dropped only when the
+    analyzer version or the schema changes.
+    """
+
+    SCHEMA_VERSION = 3  # Bump when the table layout or the way paths are stored changes
+
+    COMMIT_EVERY = 1000  # Pending writes before committing
+    COMMIT_INTERVAL = 1.0  # Seconds before committing anyway, so concurrent scans aren't locked out
+    LOCK_TIMEOUT = 30  # Seconds to wait for another scan's write lock
+
+    def __init__(self, db_path, analyzer_version, variant=''):
+        self.db_path = str(db_path)
+        self.analyzer_version = f"{self.SCHEMA_VERSION}:{analyzer_version}"
+        self.variant = variant
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._pending_writes = 0
+        self._last_commit = time.monotonic()
+        self._seen = []
+
+        self.conn = sqlite3.connect(self.db_path, timeout=self.LOCK_TIMEOUT)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)'
+        )
+
+        # Invalidate everything when the analysis logic or the schema has changed
+        if self._get_meta('analyzer_version') != self.analyzer_version:
+            self.conn.execute('DROP TABLE IF EXISTS files')
+            self._set_meta('analyzer_version', self.analyzer_version)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS files ('
+            'path BLOB, variant TEXT, size INTEGER, mtime_ns INTEGER, inode INTEGER, '
+            'scan_id INTEGER, data TEXT, PRIMARY KEY (path, variant))'
+        )
+
+        self.scan_id = int(self._get_meta('scan_id') or 0) + 1
+        self._set_meta('scan_id', str(self.scan_id))
+        self.conn.commit()
+
+    def _get_meta(self, key):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    @staticmethod
+    def _key(path):
+        """Absolute path as bytes, so relative roots share keys and undecodable names can be stored."""
+        return os.fsencode(os.path.abspath(path))
+
+    def lookup(self, file_path, file_stat):
+        """Return the cached analysis for an unchanged file, or None."""
+        path = self._key(file_path)
+        row = self.conn.execute(
+            'SELECT size, mtime_ns, inode, data FROM files WHERE path = ? AND variant = ?', (path, self.variant)
+        ).fetchone()
+        if row is None or row[:3] != (file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._seen.append((self.scan_id, path))
+        self._maybe_commit()
+        return json.loads(row[3])
+
+    def store(self, file_path, file_stat, analysis):
+        """Store the analysis result for a file."""
+        self.conn.execute(
+            'INSERT OR REPLACE INTO files (path, variant, size, mtime_ns, inode, scan_id, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (self._key(file_path), self.variant, file_stat.st_size, file_stat.st_mtime_ns, file_stat.st_ino,
+             self.scan_id, json.dumps(analysis, default=str))
+        )
+        self._pending_writes += 1
+        self._maybe_commit()
+
+    def _maybe_commit(self):
+        """Commit once enough writes are pending or the write lock has been held too long."""
+        pending = self._pending_writes + len(self._seen)
+        if pending and (pending >= self.COMMIT_EVERY
+                        or time.monotonic() - self._last_commit > self.COMMIT_INTERVAL):
+            self._flush_seen()
+            self.conn.commit()
+            self._pending_writes = 0
+            self._last_commit = time.monotonic()
+
+    def _flush_seen(self):
+        # Every variant of a path is marked: the file exists either way
+        self.conn.executemany('UPDATE files SET scan_id = ? WHERE path = ?', self._seen)
+        self._seen = []
+
+    def evict_missing(self, root_path):
+        """Drop entries under root_path for files that no longer exist.
+
+        Entries this scan did not see are only candidates: another scan (of
+        a nested or overlapping folder, or with other settings) may have
+        refreshed them meanwhile, so each is dropped only if its file is
+        really gone.
+        """
+        self._flush_seen()
+        prefix = os.path.join(self._key(root_path), b'')
+        # Range query on the primary key instead of LIKE, which would not use the index
+        upper = prefix[:-1] + bytes([prefix[-1] + 1])
+        cursor = self.conn.execute(
+            'SELECT DISTINCT path FROM files WHERE path >= ? AND path < ? AND scan_id != ?',
+            (prefix, upper, self.scan_id)
+        )
+        missing = [(path,) for (path,) in cursor if not os.path.lexists(path)]
+        self.conn.executemany('DELETE FROM files WHERE path = ?', missing)
+        self.evicted += len(missing)
+        self.conn.commit()
+        return len(missing)
+
+    def get_stats(self):
+        """Hit/miss counters for this scan."""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evicted': self.evicted,
+            'hit_rate': (self.hits / total * 100) if total else 0
+        }
+
+    def close(self):
+        self._flush_seen()
+        self.conn.commit()
+        self.conn.close()
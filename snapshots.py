@@ -0,0 +1,375 @@
+"""Compact scan snapshots and a streaming diff between two of them.
+
+A snapshot is a gzip'd text file: one JSON header line (root, time, totals,
+project dependencies), then one tab-separated line per file:
+
+    path  size  mtime_ns  mime_type  content_hash
+
+sorted by path components, the order in which FolderAnalyzer walks a tree.
+Because both sides are sorted the same way, two snapshots are compared with
+a single merge-join pass that holds one entry per side in memory, plus
+bounded heaps for the changes it reports in detail.
+
+    python snapshots.py create FOLDER OUT.snapshot.gz [--hashes]
+    python snapshots.py diff OLD.snapshot.gz NEW.snapshot.gz [--limit N] [--json]
+"""
+import gzip
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+FORMAT = 'folder-analyzer-snapshot'
+FORMAT_VERSION = 1
+HASH_CHUNK_BYTES = 1024 * 1024
+
+_ESCAPES = {'\\': '\\\\', '\t': '\\t', '\n': '\\n', '\r': '\\r'}
+_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r'}
+
+
+def hash_file(file_path, chunk_bytes=HASH_CHUNK_BYTES, token=None):
+    """BLAKE2b digest (16 bytes, hex) of a file's content.
+
+    With a cancellation token, it is checked before every chunk, so
+    cancelling doesn't wait for a large file to be read to the end.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_bytes), b''):
+            if token is not None:
+                token.check()
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def path_key(path):
+    """Sort key matching the analyzer's walk order: directory by directory.
+
+    NUL sorts before every other character, so comparing paths with the
+    separator replaced by it orders them like their lists of components.
+    """
+    return path.replace(os.sep, '\0')
+
+
+def _escape(path):
+    if '\\' in path or '\t' in path or '\n' in path or '\r' in path:
+        return ''.join(_ESCAPES.get(char, char) for char in path)
+    return path
+
+
+def _unescape(path):
+    if '\\' not in path:
+        return path
+    chars = []
+    escaped = False
+    for char in path:
+        if escaped:
+            chars.append(_UNESCAPES.get(char, char))
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        else:
+            chars.append(char)
+    return ''.join(chars)
+
+
+def write_snapshot(snapshot_path, analyzer):
+    """Write a finished analyzer's file records to a snapshot file."""
+    records = analyzer.records
+    order = records.live()
+    if records.deleted:
+        order = list(order)
+    previous = None
+    for index in order:
+        key = path_key(records.path(index))
+        if previous is not None and key < previous:
+            # Only reached if records were not merged in walk order
+            order = sorted(order, key=lambda i: path_key(records.path(i)))
+            break
+        previous = key
+
+    header = {
+        'format': FORMAT,
+        'version': FORMAT_VERSION,
+        'root': str(analyzer.root_path),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'files': len(order),
+        'total_size': analyzer.stats['total_size'],
+        'partial': analyzer.stats['partial'],
+        'hashes': bool(records.hashes),
+        'dependencies': sorted(analyzer.stats['dependencies'])
+    }
+
+    # Written to a temporary name first so a reader never sees half a snapshot
+    temp_path = f"{snapshot_path}.tmp"
+    # Paths that aren't valid UTF-8 keep their original bytes through surrogateescape
+    with gzip.open(temp_path, 'wt', encoding='utf-8', errors='surrogateescape', compresslevel=6) as f:
+        f.write(json.dumps(header) + '\n')
+        for index in order:
+            f.write(f"{_escape(records.path(index))}\t{records.sizes[index]}\t{records.mtimes[index]}\t"
+                    f"{records.types[records.type_ids[index]]}\t{records.hashes.get(index, '')}\n")
+    os.replace(temp_path, snapshot_path)
+    return header
+
+
+def read_header(snapshot_path):
+    """The header of a snapshot file."""
+    with gzip.open(snapshot_path, 'rt', encoding='utf-8', errors='surrogateescape') as f:
+        header = json.loads(f.readline())
+    if header.get('format') != FORMAT:
+        raise ValueError(f"Not a snapshot file: {snapshot_path}")
+    if header.get('version') != FORMAT_VERSION:
+        raise ValueError(f"Unsupported snapshot version {header.get('version')}: {snapshot_path}")
+    return header
+
+
+def _iter_lines(snapshot_path):
+    read_header(snapshot_path)
+    with gzip.open(snapshot_path, 'rt', encoding='utf-8', errors='surrogateescape') as f:
+        f.readline()
+        yield from f
+
+
+def _parse(line):
+    path, size, mtime, mime_type, content_hash = line.rstrip('\n').split('\t')
+    return _unescape(path), int(size), int(mtime), mime_type, content_hash
+
+
+def _line_key(line):
+    if line is None:
+        return None
+    path = line[:line.index('\t')]
+    return path_key(_unescape(path) if '\\' in path else path)
+
+
+def iter_entries(snapshot_path):
+    """Yield (path, size, mtime_ns, mime_type, content_hash) for each file in a snapshot."""
+    for line in _iter_lines(snapshot_path):
+        yield _parse(line)
+
+
+def iter_changes(old_path, new_path):
+    """Merge-join two snapshots, yielding (change, old_entry, new_entry).
+
+    change is 'added', 'removed' or 'modified'; the missing side is None.
+    Files are modified if their size, type or content hash (when both
+    snapshots have one) differ, or if only the modification time changed.
+    Identical lines, the common case, are skipped without being parsed.
+    """
+    old_lines = _iter_lines(old_path)
+    new_lines = _iter_lines(new_path)
+    old = next(old_lines, None)
+    new = next(new_lines, None)
+
+    while old is not None or new is not None:
+        if old == new:
+            old = next(old_lines, None)
+            new = next(new_lines, None)
+            continue
+
+        old_key = _line_key(old)
+        new_key = _line_key(new)
+        if new is None or (old is not None and old_key < new_key):
+            yield 'removed', _parse(old), None
+            old = next(old_lines, None)
+        elif old is None or new_key < old_key:
+            yield 'added', None, _parse(new)
+            new = next(new_lines, None)
+        else:
+            old_entry, new_entry = _parse(old), _parse(new)
+            # With content hashes on both sides, same size and hash means a touch, not an edit
+            touched = old_entry[4] and new_entry[4] and old_entry[1] == new_entry[1] \
+                and old_entry[3:] == new_entry[3:]
+            if not touched:
+                yield 'modified', old_entry, new_entry
+            old = next(old_lines, None)
+            new = next(new_lines, None)
+
+
+class _TopChanges:
+    """Bounded min-heap keeping the limit largest changes by weight; ties keep the first seen."""
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.count = 0
+        self.bytes = 0
+        self._heap = []
+
+    def add(self, weight, size_delta, item):
+        self.count += 1
+        self.bytes += size_delta
+        if self.limit <= 0:
+            return
+        entry = (weight, -self.count, item)
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self):
+        return [item for _, _, item in sorted(self._heap, key=lambda x: x[:2], reverse=True)]
+
+    def to_dict(self):
+        return {'count': self.count, 'bytes': self.bytes, 'files': self.items()}
+
+
+def diff_snapshots(old_path, new_path, limit=100):
+    """Compare two snapshots; returns counts for every change plus the largest ones.
+
+    Memory stays bounded by limit whatever the snapshot sizes: added and
+    removed files are ranked by size, grown and shrunk files by how much
+    their size changed, and files whose content changed at the same size
+    by modification time.
+    """
+    start = time.perf_counter()
+    old_header = read_header(old_path)
+    new_header = read_header(new_path)
+
+    changes = {kind: _TopChanges(limit) for kind in ('added', 'removed', 'grown', 'shrunk', 'changed')}
+    for change, old, new in iter_changes(old_path, new_path):
+        if change == 'added':
+            changes['added'].add(new[1], new[1], {'path': new[0], 'size': new[1], 'type': new[3]})
+        elif change == 'removed':
+            changes['removed'].add(old[1], -old[1], {'path': old[0], 'size': old[1], 'type': old[3]})
+        else:
+            delta = new[1] - old[1]
+            item = {'path': new[0], 'old_size': old[1], 'size': new[1], 'size_delta': delta}
+            if old[3] != new[3]:
+                item['old_type'] = old[3]
+                item['type'] = new[3]
+            kind = 'grown' if delta > 0 else 'shrunk' if delta < 0 else 'changed'
+            changes[kind].add(abs(delta) if delta else new[2], delta, item)
+
+    old_dependencies = set(old_header.get('dependencies', []))
+    new_dependencies = set(new_header.get('dependencies', []))
+    unchanged = new_header['files'] - changes['added'].count - changes['grown'].count \
+        - changes['shrunk'].count - changes['changed'].count
+
+    result = {
+        'old': {key: old_header[key] for key in ('root', 'created', 'files', 'total_size', 'partial')},
+        'new': {key: new_header[key] for key in ('root', 'created', 'files', 'total_size', 'partial')},
+        'unchanged': unchanged,
+        'size_delta': new_header['total_size'] - old_header['total_size'],
+        'dependencies': {
+            'added': sorted(new_dependencies - old_dependencies),
+            'removed': sorted(old_dependencies - new_dependencies)
+        },
+        'seconds': None
+    }
+    result.update({kind: top.to_dict() for kind, top in changes.items()})
+    result['warnings'] = [
+        f"{side.capitalize()} snapshot is from a partial scan; missing files may show as removed or added"
+        for side, header in (('old', old_header), ('new', new_header)) if header['partial']
+    ]
+    result['seconds'] = round(time.perf_counter() - start, 3)
+    return result
+
+
+class SnapshotStore:
+    """Directory of snapshots, grouped per scanned folder, newest last.
+
+    Each folder gets a subdirectory named after a hash of its absolute
+    path; only the newest keep snapshots of a folder are kept.
+    """
+
+    SUFFIX = '.snapshot.gz'
+
+    def __init__(self, directory, keep=10):
+        self.directory = directory
+        self.keep = keep
+
+    def folder_dir(self, root):
+        key = hashlib.blake2b(os.fsencode(os.path.abspath(root)), digest_size=8).hexdigest()
+        return os.path.join(self.directory, key)
+
+    def new_path(self, root):
+        """Path for a new snapshot of root, named by time so names sort by age."""
+        folder_dir = self.folder_dir(root)
+        os.makedirs(folder_dir, exist_ok=True)
+        name = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        return os.path.join(folder_dir, name + self.SUFFIX)
+
+    def list(self, root):
+        """Snapshot paths of root, oldest first."""
+        folder_dir = self.folder_dir(root)
+        try:
+            names = sorted(name for name in os.listdir(folder_dir) if name.endswith(self.SUFFIX))
+        except FileNotFoundError:
+            return []
+        return [os.path.join(folder_dir, name) for name in names]
+
+    def previous(self, snapshot_path, root):
+        """The snapshot of root taken just before snapshot_path, or None."""
+        earlier = [path for path in self.list(root) if os.path.basename(path) < os.path.basename(snapshot_path)]
+        return earlier[-1] if earlier else None
+
+    def prune(self, root):
+        """Delete all but the newest keep snapshots of root."""
+        snapshots = self.list(root)
+        for path in snapshots[:max(0, len(snapshots) - self.keep)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def print_diff(diff):
+    """Print a diff as a readable report."""
+    print(f"Old: {diff['old']['created']} ({diff['old']['files']} files)")
+    print(f"New: {diff['new']['created']} ({diff['new']['files']} files)")
+    print(f"Size change: {diff['size_delta']:+d} bytes, unchanged files: {diff['unchanged']}")
+    for kind in ('added', 'removed', 'grown', 'shrunk', 'changed'):
+        section = diff[kind]
+        print(f"\n{kind.capitalize()}: {section['count']} files ({section['bytes']:+d} bytes)")
+        for file in section['files']:
+            if 'size_delta' in file:
+                print(f"  {file['size_delta']:+d}: {file['path']}")
+            else:
+                print(f"  {file['size']}: {file['path']}")
+    for kind in ('added', 'removed'):
+        if diff['dependencies'][kind]:
+            print(f"\nDependencies {kind}: {', '.join(diff['dependencies'][kind])}")
+    for warning in diff['warnings']:
+        print(f"\nWarning: {warning}")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description='Create and compare folder scan snapshots.')
+    commands = parser.add_subparsers(dest='command', required=True)
+    create = commands.add_parser('create', help='Scan a folder and write a snapshot')
+    create.add_argument('folder')
+    create.add_argument('output')
+    create.add_argument('--hashes', action='store_true', help='Store a content hash for every file')
+    create.add_argument('--metadata-only', action='store_true')
+    diff = commands.add_parser('diff', help='Compare two snapshots')
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('--limit', type=int, default=20, help='Files listed per kind of change')
+    diff.add_argument('--json', action='store_true', help='Print the diff as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'create':
+        from folder_analyzer import FolderAnalyzer
+        analyzer = FolderAnalyzer(args.folder, metadata_only=args.metadata_only,
+                                  content_hashes=args.hashes, snapshot_path=args.output)
+        analyzer.scan()
+        print(f"Wrote {analyzer.stats['total_files']} files to {args.output}")
+        return
+
+    try:
+        result = diff_snapshots(args.old, args.new, args.limit)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_diff(result)
+
+
+if __name__ == '__main__':
+    main()
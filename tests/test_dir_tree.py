@@ -0,0 +1,41 @@
+import os
+import sys
+
+from folder_analyzer import FolderAnalyzer
+
+
+def test_sizes_roll_up(tmp_path):
+    (tmp_path / 'a' / 'b').mkdir(parents=True)
+    (tmp_path / 'top.txt').write_bytes(b'x' * 10)
+    (tmp_path / 'a' / 'b' / 'deep.txt').write_bytes(b'x' * 5)
+    analyzer = FolderAnalyzer(tmp_path, metadata_only=True)
+    analyzer.scan()
+
+    tree = analyzer.dir_tree
+    assert tree.node(0)['size'] == 15
+    assert tree.node(tree.find('a'))['size'] == 5
+    assert tree.node(tree.find('a'))['own_files'] == 0
+
+
+def test_tree_deeper_than_recursion_limit(tmp_path):
+    depth = sys.getrecursionlimit() + 100
+    directory = os.path.join(*['d'] * depth)
+    path = str(tmp_path)
+    for _ in range(depth):  # os.makedirs() recurses once per level too
+        path = os.path.join(path, 'd')
+        os.mkdir(path)
+    (tmp_path / directory / 'leaf.txt').write_bytes(b'x' * 7)
+    try:
+        analyzer = FolderAnalyzer(tmp_path, metadata_only=True)
+        analyzer.scan()
+
+        tree = analyzer.dir_tree
+        assert len(tree) == depth + 1
+        assert tree.node(0)['size'] == 7
+        assert tree.node(tree.find(directory))['own_files'] == 1
+    finally:
+        # As does shutil.rmtree(), which cleans up tmp_path
+        os.remove(os.path.join(path, 'leaf.txt'))
+        for _ in range(depth):
+            os.rmdir(path)
+            path = os.path.dirname(path)
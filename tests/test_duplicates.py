@@ -0,0 +1,45 @@
+import os
+
+from folder_analyzer import FolderAnalyzer
+
+
+def scan_duplicates(root):
+    analyzer = FolderAnalyzer(root, metadata_only=True, find_duplicates=True)
+    analyzer.scan()
+    return analyzer.stats['duplicates']
+
+
+def test_copies_are_duplicates(tmp_path):
+    content = os.urandom(500 * 1024)
+    (tmp_path / 'a.bin').write_bytes(content)
+    (tmp_path / 'b.bin').write_bytes(content)
+
+    duplicates = scan_duplicates(tmp_path)
+    assert duplicates['wasted_bytes'] == len(content)
+    assert duplicates['groups'][0]['paths'] == ['a.bin', 'b.bin']
+    assert duplicates['hard_links']['group_count'] == 0
+
+
+def test_hard_links_waste_nothing(tmp_path):
+    content = os.urandom(500 * 1024)
+    (tmp_path / 'a.bin').write_bytes(content)
+    os.link(tmp_path / 'a.bin', tmp_path / 'b.bin')
+
+    duplicates = scan_duplicates(tmp_path)
+    assert duplicates['group_count'] == 0
+    assert duplicates['wasted_bytes'] == 0
+    assert duplicates['hard_links']['linked_files'] == 1
+    assert duplicates['hard_links']['groups'][0]['paths'] == ['a.bin', 'b.bin']
+
+
+def test_copy_of_a_hard_linked_file_counts_once(tmp_path):
+    content = os.urandom(500 * 1024)
+    (tmp_path / 'a.bin').write_bytes(content)
+    os.link(tmp_path / 'a.bin', tmp_path / 'b.bin')
+    (tmp_path / 'c.bin').write_bytes(content)
+
+    duplicates = scan_duplicates(tmp_path)
+    assert duplicates['duplicate_files'] == 1
+    assert duplicates['wasted_bytes'] == len(content)
+    assert duplicates['groups'][0]['paths'] == ['a.bin', 'c.bin']
+    assert duplicates['hard_links']['linked_files'] == 1
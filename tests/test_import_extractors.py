@@ -0,0 +1,27 @@
+import pytest
+
+from import_extractors import python_imports, python_imports_ast
+
+# Imports the header scan can't read, which must still match a full parse
+LATE_IMPORTS = [
+    "from typing import TYPE_CHECKING\nif TYPE_CHECKING: import foo\n",
+    "try: import foo\nexcept ImportError: foo = None\n",
+    "x = 1; import foo\n",
+    "import os\nx = 1\nclass A: from .models import User\n",
+    "import a; import b\n",
+    "import os\n\ndef f():\n    if x: import json\n    else: from . import z\n",
+    "import os\n\ndef f():\n    import json\n",
+    '"""Docstring."""\nimport os\nx = 1\nwhile True: from pkg.sub import name; break\n',
+]
+
+
+@pytest.mark.parametrize('source', LATE_IMPORTS)
+def test_late_imports_match_ast(source):
+    assert python_imports(source) == python_imports_ast(source)
+
+
+def test_header_imports_skip_ast():
+    counters = {}
+    source = "import os, sys\nfrom .utils import helper\n\nx = {'a': 1}\n"
+    assert python_imports(source, counters) == {'os', 'sys', '.utils'}
+    assert 'import_ast_fallbacks' not in counters
@@ -0,0 +1,35 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Loaded on first use, not when the module is imported
+DEFERRED = {
+    'folder_analyzer': ['duplicates', 'estimator', 'scan_cache', 'snapshots', 'watcher', 'chardet', 'magic',
+                        'multiprocessing', 'concurrent.futures', 'sqlite3'],
+    'web_app': ['folder_analyzer', 'web_analyzer', 'content_types', 'dependency_graph', 'import_extractors',
+                'record_store', 'watcher', 'file_query', 'metrics', 'chardet', 'magic'],
+}
+
+
+def loaded_modules(module, cwd):
+    """Modules in sys.modules after importing module in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-c', f'import sys, {module}; print("\\n".join(sys.modules))'],
+        cwd=cwd, env=dict(os.environ, PYTHONPATH=ROOT), capture_output=True, text=True, check=True
+    )
+    return set(result.stdout.split())
+
+
+@pytest.mark.parametrize('module', sorted(DEFERRED))
+def test_heavy_imports_are_deferred(module, tmp_path):
+    if module == 'web_app':
+        pytest.importorskip('flask')
+        pytest.importorskip('flask_cors')
+    # Importing web_app tidies its working directory, so run in a scratch one
+    loaded = loaded_modules(module, tmp_path)
+    assert module in loaded
+    assert sorted(name for name in DEFERRED[module] if name in loaded) == []
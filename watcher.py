@@ -0,0 +1,319 @@
+"""Keep a finished scan's results current while its folder changes.
+
+On Linux, changes are reported by inotify (called through ctypes, so no
+extra package is needed); elsewhere, or when inotify can't watch the whole
+tree, the tree is polled. Events are not applied one at a time: the paths
+they name are collected until the tree has been quiet for DEBOUNCE_SECONDS
+(or MAX_DELAY_SECONDS into a continuous burst) and handed to
+FolderAnalyzer.apply_changes() as one batch, which stats each path once and
+analyzes again only the files whose size or modification time changed.
+"""
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import threading
+import time
+
+# Event bits from linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_DONT_FOLLOW)
+EVENT_HEADER = struct.Struct('iIII')  # Watch descriptor, mask, cookie, name length
+
+
+def _libc():
+    """The C library with inotify bound, or None where there is no inotify."""
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(None, use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class InotifySource:
+    """Changed paths under a tree, from Linux inotify.
+
+    An inotify watch covers one directory, so every directory in the tree
+    gets one, and directories created or moved in later are watched as they
+    appear. read() returns (path, is_directory) pairs: a file that may have
+    been created, changed or deleted, or a directory whose whole subtree
+    needs reconciling (created, removed or moved, or the root when the
+    kernel's event queue overflowed and events were lost).
+    """
+
+    READ_BYTES = 64 * 1024
+
+    def __init__(self, root, skip_dirs=()):
+        self._libc = _libc()
+        if self._libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available on this platform")
+        self.root = str(root)
+        self.skip_dirs = set(skip_dirs)
+        self._dirs = {}  # Watch descriptor -> directory path
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            error = ctypes.get_errno()
+            raise OSError(error, f"inotify_init1 failed: {os.strerror(error)}")
+        try:
+            self._watch_tree(self.root)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, top):
+        """Watch a directory and every directory below it.
+
+        Raises OSError when the kernel's watch limit is reached; directories
+        that vanish or can't be read meanwhile are left out, as in a scan.
+        """
+        stack = [top]
+        while stack:
+            directory = stack.pop()
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                error = ctypes.get_errno()
+                if error in (errno.ENOSPC, errno.ENOMEM):
+                    raise OSError(error, f"Cannot watch {directory}: inotify watch limit reached "
+                                         f"(fs.inotify.max_user_watches)")
+                continue
+            self._dirs[wd] = directory
+            try:
+                with os.scandir(directory) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False) and entry.name not in self.skip_dirs:
+                            stack.append(entry.path)
+            except OSError:
+                continue
+
+    def _unwatch_tree(self, top):
+        """Stop watching a directory that moved away, and everything below it."""
+        prefix = top + os.sep
+        for wd, directory in list(self._dirs.items()):
+            if directory == top or directory.startswith(prefix):
+                self._libc.inotify_rm_watch(self._fd, wd)
+                del self._dirs[wd]
+
+    def read(self, timeout):
+        """Changed paths reported within timeout seconds; empty if there were none."""
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, self.READ_BYTES)
+        except BlockingIOError:
+            return []
+
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.append((self.root, True))
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if not name:
+                # The watched directory itself; its parent reports the change,
+                # except for the root, which has no watched parent
+                if directory == self.root and mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    changes.append((self.root, True))
+                continue
+
+            path = os.path.join(directory, name)
+            if not mask & IN_ISDIR:
+                changes.append((path, False))
+            elif name not in self.skip_dirs and mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                if mask & IN_MOVED_FROM:
+                    self._unwatch_tree(path)
+                elif mask & (IN_CREATE | IN_MOVED_TO):
+                    self._watch_tree(path)
+                changes.append((path, True))
+        return changes
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingSource:
+    """Fallback change source: the whole tree is reconciled every interval."""
+
+    def __init__(self, root, interval):
+        self.root = str(root)
+        self.interval = interval
+        self._due = time.monotonic() + interval
+
+    def read(self, timeout):
+        wait = self._due - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, wait))
+        self._due = time.monotonic() + self.interval
+        return [(self.root, True)]
+
+    def close(self):
+        pass
+
+
+class FolderWatcher:
+    """Applies a folder's changes to its analyzer from a background thread."""
+
+    DEBOUNCE_SECONDS = 0.5  # Quiet time that ends a burst of events
+    MAX_DELAY_SECONDS = 5.0  # Longest a continuous burst can hold back an update
+    POLL_SECONDS = 10.0  # Interval between reconciles of the whole tree when polling
+    IDLE_TIMEOUT = 1.0  # Longest wait for events, so stop() is noticed
+
+    def __init__(self, analyzer, polling=False, debounce=None, poll_seconds=None, on_update=None):
+        self.analyzer = analyzer
+        self.polling = polling  # Poll even where inotify is available
+        self.debounce = self.DEBOUNCE_SECONDS if debounce is None else debounce
+        self.poll_seconds = poll_seconds or self.POLL_SECONDS
+        self.on_update = on_update  # Called with the counts of every batch that changed something
+        self.mode = None  # 'inotify' or 'polling' once started
+        self.events = 0
+        self.batches = 0
+        self.started_at = None
+        self._source = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start watching; returns self."""
+        self.analyzer.start_live()
+        self._source = self._open_source()
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name='folder-watch', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stop watching, abandoning a batch in progress."""
+        self._stop.set()
+        self.analyzer.cancel('stopped')
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        """Watch state for the API."""
+        return {
+            'mode': self.mode,
+            'running': self.running,
+            'started_at': self.started_at,
+            'debounce_seconds': self.debounce,
+            'poll_seconds': self.poll_seconds if self.mode == 'polling' else None,
+            'events': self.events,
+            'batches': self.batches
+        }
+
+    def _open_source(self):
+        root = str(self.analyzer.root_path)
+        if not self.polling:
+            try:
+                source = InotifySource(root, self.analyzer.skip_dirs)
+                self.mode = 'inotify'
+                return source
+            except OSError as e:
+                self.analyzer.add_warning(f"Watching by polling every {self.poll_seconds:g}s: {e}")
+        self.mode = 'polling'
+        return PollingSource(root, self.poll_seconds)
+
+    def _run(self):
+        root = str(self.analyzer.root_path)
+        try:
+            # Changes made between the scan and the first watch left no events
+            self._apply(set(), {root})
+            files, directories = set(), set()
+            first = last = None  # When the pending batch's first and latest events arrived
+            while not self._stop.is_set():
+                if first is None:
+                    timeout = self.IDLE_TIMEOUT
+                else:
+                    timeout = max(0.0, min(last + self.debounce, first + self.MAX_DELAY_SECONDS) - time.monotonic())
+                try:
+                    changes = self._source.read(timeout)
+                except OSError as e:
+                    # Typically the watch limit, hit by a new directory
+                    self.analyzer.add_warning(f"Watching by polling every {self.poll_seconds:g}s: {e}")
+                    self._source.close()
+                    self._source = PollingSource(root, self.poll_seconds)
+                    self.mode = 'polling'
+                    changes = [(root, True)]
+
+                now = time.monotonic()
+                if changes:
+                    self.events += len(changes)
+                    for path, is_directory in changes:
+                        (directories if is_directory else files).add(path)
+                    if first is None:
+                        first = now
+                    last = now
+                if first is not None and (now >= last + self.debounce or now >= first + self.MAX_DELAY_SECONDS):
+                    self._apply(files, directories)
+                    files, directories = set(), set()
+                    first = last = None
+        finally:
+            self._source.close()
+
+    def _apply(self, files, directories):
+        """Apply one coalesced batch of changed paths."""
+        directories = _outermost(directories)
+        prefixes = tuple(directory + os.sep for directory in directories)
+        files = [path for path in files if path not in directories and not path.startswith(prefixes)]
+        start = time.perf_counter()
+        try:
+            summary = self.analyzer.apply_changes(files, directories)
+        except Exception as e:
+            self.analyzer.add_warning(f"Error applying changes: {str(e)}")
+            return
+        if summary is None:
+            return
+        self.batches += 1
+        self.analyzer.metrics.observe('watch_update', time.perf_counter() - start)
+        if self.on_update is not None and any(summary.values()):
+            self.on_update(summary)
+
+
+def _outermost(directories):
+    """Directories not inside another one of them; reconciling those covers the rest."""
+    kept = []
+    for directory in sorted(directories, key=len):
+        if not any(directory == other or directory.startswith(other + os.sep) for other in kept):
+            kept.append(directory)
+    return kept
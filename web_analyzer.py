@@ -0,0 +1,108 @@
+import os
+
+from file_query import FileQuery
+from folder_analyzer import FolderAnalyzer
+
+
+class WebAnalyzer(FolderAnalyzer):
+    """FolderAnalyzer for the web app: results as JSON data and a file query index."""
+
+    RELATED_RESULT_GROUPS = 100  # Related-file groups included in results
+    TREE_RESULT_CHILDREN = 20  # Top-level directories included in results; the rest load through /tree
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.file_query = FileQuery(self.records)
+
+    def display_results(self):
+        """Override display_results to return JSON data instead of console output"""
+        results = {
+            'project_overview': {
+                'project_type': self.stats['project_type'],
+                'total_files': self.stats['total_files'],
+                'total_size': self.human_size(self.stats['total_size'])
+            },
+            'content_analysis': {},
+            'related_files': {},
+            'file_types': [],
+            'largest_files': [],
+            'newest_files': [],
+            'duplicates': None,
+            'directories': self.dir_tree.node(0, depth=1, limit=self.TREE_RESULT_CHILDREN) if self.dir_tree.built else None,
+            'cache': self.stats['cache'],
+            'classifier': self.stats['classifier'],
+            'partial': self.stats['partial'],
+            'truncated': self.stats['truncated'],
+            'estimate': self.stats['estimate'],
+            'dependency_graph': self.stats['dependency_graph'],
+            'snapshot': os.path.basename(self.stats['snapshot']) if self.stats['snapshot'] else None,
+            'metrics': self.stats['metrics'],
+            'profile': self.stats['profile'],
+            'progress': self.get_progress(),
+            'warnings': self.stats['progress']['warnings']
+        }
+
+        # Content Groups
+        for content_type, group in self.stats['content_groups'].items():
+            results['content_analysis'][content_type] = {
+                'count': group['count'],
+                'files': [{
+                    'path': file['path'],
+                    'dependencies': file.get('dependencies', [])[:5],
+                    'purpose': file.get('purpose', '')
+                } for file in group['files'][:5]]
+            }
+
+        # Related Files; the full set is too large to inline for big trees
+        groups = [(main_file, related) for main_file, related in self.stats['related_files'].items() if related]
+        results['related_files'] = dict(groups[:self.RELATED_RESULT_GROUPS])
+        results['related_groups'] = len(groups)
+
+        # File Types
+        results['file_types'] = [
+            {'type': file_type, 'count': count}
+            for file_type, count in sorted(self.stats['file_types'].items(), key=lambda x: x[1], reverse=True)
+        ]
+
+        # Largest Files
+        results['largest_files'] = [
+            {'size': self.human_size(self.records.sizes[index]), 'path': self.records.path(index)}
+            for index in self.stats['largest_files']
+        ]
+
+        # Newest Files
+        results['newest_files'] = [
+            {
+                'modified': self.records.get(index)['modified'].strftime('%Y-%m-%d %H:%M:%S'),
+                'path': self.records.path(index)
+            }
+            for index in self.stats['newest_files']
+        ]
+
+        # Duplicate Files
+        duplicates = self.stats['duplicates']
+        if duplicates is not None:
+            results['duplicates'] = {
+                'group_count': duplicates['group_count'],
+                'duplicate_files': duplicates['duplicate_files'],
+                'wasted': self.human_size(duplicates['wasted_bytes']),
+                'wasted_bytes': duplicates['wasted_bytes'],
+                'groups': [{
+                    'size': self.human_size(group['size']),
+                    'count': group['count'],
+                    'wasted': self.human_size(group['wasted_bytes']),
+                    'wasted_bytes': group['wasted_bytes'],
+                    'paths': group['paths']
+                } for group in duplicates['groups']],
+                'hard_links': {
+                    'group_count': duplicates['hard_links']['group_count'],
+                    'linked_files': duplicates['hard_links']['linked_files'],
+                    'groups': [{
+                        'size': self.human_size(group['size']),
+                        'count': group['count'],
+                        'paths': group['paths']
+                    } for group in duplicates['hard_links']['groups']]
+                }
+            }
+
+        return results
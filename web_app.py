@@ -1,18 +1,44 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
-from folder_analyzer import FolderAnalyzer
+from jobs import JobManager
+from snapshots import SnapshotStore, diff_snapshots, read_header
 import os
-from pathlib import Path
+import gzip
 import threading
-import time
+import uuid
+import zlib
+from pathlib import Path
 import json
+import time
 from datetime import datetime
+# The analyzer (web_analyzer, and through it folder_analyzer and its content
+# and dependency modules), the file query index, the watcher and the metrics
+# renderer are imported where they are used, so the server starts fast; jobs
+# and snapshots only need the standard library
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 app = Flask(__name__)
 CORS(app)
 
 # Constants
 HISTORY_FILE = 'folder_history.json'
+CACHE_FILE = 'scan_cache.sqlite'  # Persistent per-file analysis cache
+SNAPSHOT_DIR = 'snapshots'  # Per-folder scan snapshots, for diffs between runs
+MAX_SNAPSHOTS = 10  # Snapshots kept per folder
+RESULTS_DIR = 'results'  # Per-job NDJSON exports of every analyzed file
+EXPORT_CHUNK_BYTES = 256 * 1024  # Read size when streaming an export
+EXPORT_BATCH_ROWS = 1000  # File rows per chunk of a streamed listing
+COMPRESS_MIN_BYTES = 1024  # Smaller responses are sent uncompressed
+COMPRESSIBLE_TYPES = {'application/json', 'application/x-ndjson', 'text/html', 'text/plain',
+                      'text/css', 'application/javascript'}
+MAX_CONCURRENT_JOBS = int(os.environ.get('FOLDER_ANALYZER_MAX_JOBS', 2))  # Scans running at once
+PROGRESS_STREAM_INTERVAL = 0.25  # Minimum seconds between pushed progress events
+PROGRESS_STREAM_KEEPALIVE = 15  # Seconds of silence before sending an SSE comment
+MAX_WATCHERS = int(os.environ.get('FOLDER_ANALYZER_MAX_WATCHERS', 4))  # Folders kept current at once
 MAX_HISTORY = 10  # Maximum number of folders to remember
 
 def load_history():
@@ -59,66 +85,94 @@ def add_security_headers(response):
     response.headers['X-XSS-Protection'] = '1; mode=block'
     return response
 
-# Global variable to store the current analyzer instance
-current_analyzer = None
-analysis_lock = threading.Lock()
-
-class WebAnalyzer(FolderAnalyzer):
-    def display_results(self):
-        """Override display_results to return JSON data instead of console output"""
-        results = {
-            'project_overview': {
-                'project_type': self.stats['project_type'],
-                'total_files': self.stats['total_files'],
-                'total_size': self.human_size(self.stats['total_size'])
-            },
-            'content_analysis': {},
-            'related_files': {},
-            'file_types': [],
-            'largest_files': [],
-            'newest_files': [],
-            'progress': self.get_progress(),
-            'warnings': self.stats['progress']['warnings']
-        }
-
-        # Content Groups
-        for content_type, files in self.stats['content_groups'].items():
-            results['content_analysis'][content_type] = {
-                'count': len(files),
-                'files': [{
-                    'path': file['path'],
-                    'dependencies': file.get('dependencies', [])[:5],
-                    'purpose': file.get('purpose', '')
-                } for file in files[:5]]
-            }
+# Response compression
+def accepted_encoding():
+    """Best content coding the client accepts: br (if available), gzip or None."""
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
 
-        # Related Files
-        for main_file, related in self.stats['related_files'].items():
-            if related:
-                results['related_files'][main_file] = related
-
-        # File Types
-        results['file_types'] = [
-            {'type': file_type, 'count': count}
-            for file_type, count in sorted(self.stats['file_types'].items(), key=lambda x: x[1], reverse=True)
-        ]
-
-        # Largest Files
-        results['largest_files'] = [
-            {'size': file['size_human'], 'path': file['path']}
-            for file in self.stats['largest_files']
-        ]
-
-        # Newest Files
-        results['newest_files'] = [
-            {
-                'modified': file['modified'].strftime('%Y-%m-%d %H:%M:%S'),
-                'path': file['path']
-            }
-            for file in self.stats['newest_files']
-        ]
+def compress_chunks(chunks, encoding):
+    """Compress a streamed body chunk by chunk, flushing after each so the client sees rows as they come."""
+    if encoding == 'br':
+        compressor = brotli.Compressor()
+        compress, flush, finish = compressor.process, compressor.flush, compressor.finish
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+        compress, finish = compressor.compress, compressor.flush
+        flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            yield compress(chunk) + flush()
+        yield finish()
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+@app.after_request
+def compress_response(response):
+    """gzip or brotli-encode JSON, NDJSON and text responses when the client accepts it.
+
+    Streamed responses are compressed incrementally; server-sent events,
+    file passthroughs and already-encoded bodies are left alone.
+    """
+    if (response.mimetype not in COMPRESSIBLE_TYPES or response.direct_passthrough
+            or 'Content-Encoding' in response.headers or not 200 <= response.status_code < 300):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = accepted_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return response
+        response.set_data(brotli.compress(data) if encoding == 'br' else gzip.compress(data, compresslevel=6))
+    response.headers['Content-Encoding'] = encoding
+    return response
+
+# Background analysis jobs
+watchers = {}  # Job ID -> FolderWatcher keeping that job's results current
+watchers_lock = threading.Lock()
+
+def discard_job(job):
+    """Stop watching, and delete the stored export of, a job the manager no longer tracks."""
+    with watchers_lock:
+        watcher = watchers.pop(job.id, None)
+    if watcher is not None:
+        watcher.stop()
+    if job.analyzer.spill_path:
+        try:
+            os.remove(job.analyzer.spill_path)
+        except OSError:
+            pass
 
-        return results
+def clear_results():
+    """Exports left by a previous server run belong to jobs that no longer exist."""
+    if os.path.isdir(RESULTS_DIR):
+        for name in os.listdir(RESULTS_DIR):
+            if name.endswith('.ndjson.gz'):
+                try:
+                    os.remove(os.path.join(RESULTS_DIR, name))
+                except OSError:
+                    pass
+
+snapshot_store = SnapshotStore(SNAPSHOT_DIR, keep=MAX_SNAPSHOTS)
+job_manager = JobManager(max_concurrent=MAX_CONCURRENT_JOBS, on_discard=discard_job)
+# Worker processes started with spawn re-import this module as __mp_main__;
+# they must leave the server's stored results alone
+if __name__ != '__mp_main__':
+    clear_results()
 
 @app.route('/')
 def index():
@@ -131,55 +185,549 @@ def get_history():
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
-    global current_analyzer
-    
+    """Start an analysis job and return its ID immediately."""
     folder_path = request.json.get('path', '.')
     if not os.path.exists(folder_path):
         return jsonify({'error': 'Path does not exist'}), 404
-    
+
+    # Estimates cover a sample of the tree, which can't be diffed against later scans
+    estimate = bool(request.json.get('estimate', False))
     try:
-        with analysis_lock:
-            analyzer = WebAnalyzer(folder_path)
-            current_analyzer = analyzer
-            analyzer.scan()
-            results = analyzer.display_results()
-            current_analyzer = None
-            
-            # Save to history only if analysis was successful
-            save_history(folder_path)
-            
-            # Check for warnings
-            if analyzer.stats['progress']['warnings']:
-                results['warnings'] = analyzer.stats['progress']['warnings']
-                
-            return jsonify(results)
+        estimate_seconds = float(request.json['estimate_seconds']) if request.json.get('estimate_seconds') else None
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        from web_analyzer import WebAnalyzer
+        analyzer = WebAnalyzer(folder_path, cache_path=CACHE_FILE,
+                               spill_path=os.path.join(RESULTS_DIR, f'{uuid.uuid4().hex}.ndjson.gz'),
+                               snapshot_path=None if estimate else snapshot_store.new_path(folder_path),
+                               find_duplicates=bool(request.json.get('duplicates', False)),
+                               estimate=estimate, estimate_seconds=estimate_seconds)
     except ValueError as e:
-        current_analyzer = None
         return jsonify({'error': str(e)}), 400
-    except Exception as e:
-        current_analyzer = None
+
+    def on_success(job):
+        # Save to history only if analysis was successful
+        save_history(job.folder_path)
+        snapshot_store.prune(job.folder_path)
+
+    job = job_manager.submit(folder_path, analyzer, on_success=on_success)
+    return jsonify({'job_id': job.id, 'status': job.status}), 202
+
+@app.route('/jobs')
+def list_jobs():
+    """List known analysis jobs, newest first."""
+    return jsonify(job_manager.list())
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id):
+    """Get the status of an analysis job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/progress')
+def get_job_progress(job_id):
+    """Get the progress of an analysis job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return job_progress_response(job)
+
+@app.route('/jobs/<job_id>/metrics')
+def get_job_metrics(job_id):
+    """Live stage timings and I/O counters of a job, kept out of the progress payload."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.analyzer.metrics.summary())
+
+@app.route('/jobs/<job_id>/result')
+def get_job_result(job_id):
+    """Get the results of a finished analysis job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status == 'failed':
+        return jsonify({'error': job.error, 'status': job.status}), 500
+    if job.status == 'cancelled' and job.result is None:
+        return jsonify({'error': 'Analysis cancelled before it started', 'status': job.status}), 409
+    if not job.finished:
+        return jsonify({'error': 'Analysis not finished', 'status': job.status}), 202
+    # Cancelled jobs return whatever was analyzed before the stop
+    return jsonify(job.result)
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel an analysis job."""
+    if job_manager.cancel(job_id):
+        return jsonify({'message': 'Analysis cancelled'})
+    return jsonify({'message': 'No analysis in progress'}), 404
+
+def job_dependency_graph(job_id):
+    """Return (graph, None) for a job whose dependency graph is ready, or (None, error response)."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return None, (jsonify({'error': 'Job not found'}), 404)
+    if job.finished:
+        job.analyzer.refresh_views()
+    graph = job.analyzer.dependency_graph
+    if not job.finished or not graph.built:
+        return None, (jsonify({'error': 'Dependency graph not available', 'status': job.status}), 409)
+    return graph, None
+
+def query_limit(default=20, maximum=1000):
+    """The 'limit' query parameter, clamped to a sane range."""
+    try:
+        return max(1, min(int(request.args.get('limit', default)), maximum))
+    except ValueError:
+        return default
+
+@app.route('/jobs/<job_id>/dependencies')
+def get_job_dependencies(job_id):
+    """Dependency graph summary: counts, fan-in/fan-out rankings and import cycles."""
+    graph, error = job_dependency_graph(job_id)
+    if error:
+        return error
+    limit = query_limit()
+    summary = graph.summary(limit)
+    summary['cycle_groups'] = graph.cycles(limit)
+    return jsonify(summary)
+
+@app.route('/jobs/<job_id>/dependencies/importers')
+def get_job_importers(job_id):
+    """Files importing a module name or in-tree file path (?name=...)."""
+    graph, error = job_dependency_graph(job_id)
+    if error:
+        return error
+    name = request.args.get('name', '')
+    node = graph.find(name)
+    if node is None:
+        return jsonify({'error': f'Unknown module or file: {name}'}), 404
+    return jsonify({'name': graph.node_name(node), 'importers': graph.importers(node)})
+
+@app.route('/jobs/<job_id>/dependencies/imports')
+def get_job_imports(job_id):
+    """What a file imports (?path=...), with in-tree imports resolved to paths."""
+    graph, error = job_dependency_graph(job_id)
+    if error:
+        return error
+    path = request.args.get('path', '')
+    node = graph.find(path)
+    if node is None or node >= graph.file_count:
+        return jsonify({'error': f'Unknown file: {path}'}), 404
+    return jsonify({'path': graph.node_name(node), 'imports': graph.imports(node)})
+
+@app.route('/jobs/<job_id>/dependencies/cycles')
+def get_job_cycles(job_id):
+    """Import cycles (strongly connected components), largest first."""
+    graph, error = job_dependency_graph(job_id)
+    if error:
+        return error
+    return jsonify({'cycles': graph.cycles(query_limit(default=100))})
+
+def finished_job(job_id):
+    """Return (job, None) for a job whose records are ready, or (None, error response)."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return None, (jsonify({'error': 'Job not found'}), 404)
+    if not job.finished or job.result is None:
+        return None, (jsonify({'error': 'Results not available', 'status': job.status}), 409)
+    return job, None
+
+def file_listing_args():
+    """Filters and sort order of a file listing from the query string; raises ValueError on bad input."""
+    args = request.args
+    filters = {
+        'mime_type': args.get('type') or None,
+        'min_size': int(args['min_size']) if args.get('min_size') else None,
+        'max_size': int(args['max_size']) if args.get('max_size') else None,
+        'directory': args.get('dir') or None,
+        'recursive': args.get('recursive', '1') not in ('0', 'false', 'no')
+    }
+    from file_query import FileQuery
+    sort = args.get('sort', 'path')
+    if sort not in FileQuery.SORT_KEYS:
+        raise ValueError(f"sort must be one of: {', '.join(FileQuery.SORT_KEYS)}")
+    order = args.get('order', 'asc')
+    if order not in ('asc', 'desc'):
+        raise ValueError("order must be asc or desc")
+    return filters, sort, order == 'desc'
+
+@app.route('/jobs/<job_id>/files')
+def get_job_files(job_id):
+    """One page of a job's files (?type=&min_size=&max_size=&dir=&sort=&order=&limit=&cursor=).
+
+    Pass the returned next_cursor back with the same filters and sort to get
+    the following page; it is null on the last page.
+    """
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    try:
+        filters, sort, descending = file_listing_args()
+        with job.analyzer.live_lock:
+            files, next_cursor = job.analyzer.file_query.page(
+                limit=query_limit(default=100, maximum=job.analyzer.file_query.MAX_LIMIT), cursor=request.args.get('cursor'),
+                sort=sort, descending=descending, **filters
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({
+        'job_id': job.id,
+        'total_files': job.analyzer.stats['total_files'],
+        'sort': sort,
+        'order': 'desc' if descending else 'asc',
+        'files': files,
+        'next_cursor': next_cursor
+    })
+
+@app.route('/jobs/<job_id>/files.ndjson')
+def export_job_files(job_id):
+    """Stream every matching file of a job as JSON lines; takes the same filters as /files."""
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    try:
+        filters, sort, descending = file_listing_args()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    query = job.analyzer.file_query
+
+    def rows():
+        batch = []
+        for _, index in query.iter_indices(sort, descending, query.matcher(**filters)):
+            batch.append(json.dumps(query.row(index)))
+            if len(batch) == EXPORT_BATCH_ROWS:
+                yield '\n'.join(batch) + '\n'
+                batch = []
+        if batch:
+            yield '\n'.join(batch) + '\n'
+
+    return Response(stream_with_context(rows()), mimetype='application/x-ndjson')
+
+@app.route('/jobs/<job_id>/export.ndjson')
+def export_job_analysis(job_id):
+    """Stream the full per-file analysis of a job as JSON lines.
+
+    The export is stored gzip-compressed, so clients accepting gzip get the
+    stored bytes as-is; others get it decompressed on the fly.
+    """
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    spill_path = job.analyzer.spill_path
+    if not spill_path or not os.path.exists(spill_path):
+        return jsonify({'error': 'Export not available'}), 404
+
+    passthrough = bool(request.accept_encodings['gzip'])
+    headers = {'Vary': 'Accept-Encoding'}
+    if passthrough:
+        headers['Content-Encoding'] = 'gzip'
+
+    def chunks():
+        with (open(spill_path, 'rb') if passthrough else gzip.open(spill_path, 'rb')) as f:
+            while True:
+                chunk = f.read(EXPORT_CHUNK_BYTES)
+                if not chunk:
+                    return
+                yield chunk
+
+    return Response(chunks(), mimetype='application/x-ndjson', headers=headers)
+
+def tree_response(job):
+    """One level (or ?depth=N levels) of a job's directory tree below ?path=."""
+    if job.finished:
+        job.analyzer.refresh_views()
+    if not job.finished or not job.analyzer.dir_tree.built:
+        return jsonify({'error': 'Directory tree not available', 'status': job.status}), 409
+    tree = job.analyzer.dir_tree
+    path = request.args.get('path', '')
+    node = tree.find(path)
+    if node is None:
+        return jsonify({'error': f'Directory not found: {path}'}), 404
+    try:
+        depth = max(0, min(int(request.args.get('depth', 1)), 5))
+    except ValueError:
+        depth = 1
+    result = tree.node(node, depth=depth, limit=query_limit(default=tree.DEFAULT_LIMIT))
+    result['job_id'] = job.id
+    return jsonify(result)
+
+@app.route('/jobs/<job_id>/tree')
+def get_job_tree(job_id):
+    """Lazily served directory tree of a finished job."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return tree_response(job)
+
+@app.route('/tree')
+def get_tree():
+    """Directory tree of ?job=<id>, or of the most recent finished analysis."""
+    job_id = request.args.get('job')
+    if job_id:
+        job = job_manager.get(job_id)
+    else:
+        job = next((job for job in reversed(job_manager.all()) if job.finished and job.result is not None), None)
+    if job is None:
+        return jsonify({'error': 'No finished analysis'}), 404
+    return tree_response(job)
+
+@app.route('/jobs/<job_id>/diff')
+def get_job_diff(job_id):
+    """Changes since the previous snapshot of the same folder, or since job ?against=<id>."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    new_snapshot = job.analyzer.stats['snapshot']
+    if not job.finished or not new_snapshot:
+        return jsonify({'error': 'Snapshot not available', 'status': job.status}), 409
+
+    against = request.args.get('against')
+    if against:
+        other = job_manager.get(against)
+        if other is None:
+            return jsonify({'error': 'Job to compare against not found'}), 404
+        old_snapshot = other.analyzer.stats['snapshot']
+    else:
+        old_snapshot = snapshot_store.previous(new_snapshot, job.folder_path)
+    if not old_snapshot:
+        return jsonify({'error': 'No earlier snapshot to compare against'}), 404
+    return snapshot_diff_response(old_snapshot, new_snapshot)
+
+@app.route('/snapshots')
+def list_snapshots():
+    """Stored snapshots of a folder (?path=...), oldest first."""
+    folder_path = request.args.get('path', '.')
+    snapshots = []
+    for snapshot_path in snapshot_store.list(folder_path):
+        try:
+            header = read_header(snapshot_path)
+        except (OSError, ValueError):
+            continue
+        snapshots.append({
+            'name': os.path.basename(snapshot_path),
+            'created': header['created'],
+            'files': header['files'],
+            'total_size': header['total_size'],
+            'partial': header['partial']
+        })
+    return jsonify(snapshots)
+
+@app.route('/snapshots/diff')
+def diff_stored_snapshots():
+    """Compare two stored snapshots of a folder (?path=&old=&new=, defaulting to the latest two)."""
+    folder_path = request.args.get('path', '.')
+    snapshots = {os.path.basename(path): path for path in snapshot_store.list(folder_path)}
+    names = sorted(snapshots)
+    old_name = request.args.get('old') or (names[-2] if len(names) > 1 else None)
+    new_name = request.args.get('new') or (names[-1] if names else None)
+    if old_name not in snapshots or new_name not in snapshots:
+        return jsonify({'error': 'Snapshot not found'}), 404
+    return snapshot_diff_response(snapshots[old_name], snapshots[new_name])
+
+def snapshot_diff_response(old_snapshot, new_snapshot):
+    try:
+        return jsonify(diff_snapshots(old_snapshot, new_snapshot, query_limit(default=100)))
+    except FileNotFoundError:
+        return jsonify({'error': 'Snapshot no longer exists'}), 410
+    except (OSError, ValueError) as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/progress')
-def get_progress():
-    """Get the current analysis progress."""
-    if current_analyzer is None:
-        return jsonify({'error': 'No analysis in progress'}), 404
-    
+def job_progress_response(job):
     try:
-        progress = current_analyzer.get_progress()
-        if current_analyzer.stats['progress']['warnings']:
-            progress['warnings'] = current_analyzer.stats['progress']['warnings']
+        progress = job.analyzer.get_progress()
+        progress['status'] = job.status
+        progress['job_id'] = job.id
         return jsonify(progress)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def progress_events(job):
+    """Server-sent events carrying only what changed in a job's progress.
+
+    The generator sleeps on the analyzer's progress condition between
+    updates and sends at most one event per PROGRESS_STREAM_INTERVAL, so
+    an idle stream costs nothing but a keepalive comment.
+    """
+    analyzer = job.analyzer
+    last_sent = {}
+    warnings_sent = 0
+    version = None
+
+    while True:
+        version = analyzer.wait_for_progress(version, timeout=PROGRESS_STREAM_KEEPALIVE)
+
+        progress = analyzer.get_progress()
+        progress['status'] = job.status
+        warnings = progress.pop('warnings')
+
+        delta = {key: value for key, value in progress.items() if last_sent.get(key) != value}
+        if not last_sent:
+            # First event of a (re)connected stream carries the full state
+            delta['reset'] = True
+        last_sent.update(delta)
+        if len(warnings) > warnings_sent:
+            delta['new_warnings'] = warnings[warnings_sent:]
+            warnings_sent = len(warnings)
+
+        if delta:
+            yield f"data: {json.dumps(delta)}\n\n"
+        else:
+            yield ": keepalive\n\n"
+
+        if job.finished:
+            yield f"event: done\ndata: {json.dumps({'status': job.status})}\n\n"
+            return
+
+        time.sleep(PROGRESS_STREAM_INTERVAL)
+
+def progress_stream_response(job):
+    return Response(
+        stream_with_context(progress_events(job)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/jobs/<job_id>/progress/stream')
+def stream_job_progress(job_id):
+    """Stream a job's progress as server-sent events."""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return progress_stream_response(job)
+
+@app.route('/progress/stream')
+def stream_progress():
+    """Stream the most recent analysis' progress as server-sent events."""
+    job = job_manager.latest()
+    if job is None:
+        return jsonify({'error': 'No analysis in progress'}), 404
+    return progress_stream_response(job)
+
+@app.route('/progress')
+def get_progress():
+    """Get the progress of the most recent analysis."""
+    job = job_manager.latest()
+    if job is None or job.finished:
+        return jsonify({'error': 'No analysis in progress'}), 404
+    return job_progress_response(job)
+
+def live_state(job):
+    """Current results of a job, brought up to date by its watcher if it has one."""
+    with watchers_lock:
+        watcher = watchers.get(job.id)
+    analyzer = job.analyzer
+    with analyzer.live_lock:
+        analyzer.refresh_views()
+        results = analyzer.display_results()
+        results['live'] = dict(analyzer.stats['live']) if analyzer.stats['live'] else None
+    results['watch'] = watcher.status() if watcher is not None else None
+    results['job_id'] = job.id
+    return results
+
+@app.route('/jobs/<job_id>/watch', methods=['POST'])
+def start_watch(job_id):
+    """Keep a completed job's results current as its folder changes ({"polling": true} to poll)."""
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    if job.status != 'completed' or job.analyzer.estimate:
+        return jsonify({'error': 'Only a complete, full scan can be watched', 'status': job.status}), 409
+    options = request.get_json(silent=True) or {}
+    with watchers_lock:
+        watcher = watchers.get(job.id)
+        if watcher is not None and watcher.running:
+            return jsonify(watcher.status())
+        if sum(1 for other in watchers.values() if other.running) >= MAX_WATCHERS:
+            return jsonify({'error': f'Already watching {MAX_WATCHERS} folders'}), 429
+        from watcher import FolderWatcher
+        try:
+            watcher = FolderWatcher(job.analyzer, polling=bool(options.get('polling', False)),
+                                    poll_seconds=float(options['poll_seconds']) if options.get('poll_seconds') else None)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'poll_seconds must be a number'}), 400
+        watchers[job.id] = watcher.start()
+    return jsonify(watcher.status()), 201
+
+@app.route('/jobs/<job_id>/watch', methods=['DELETE'])
+def stop_watch(job_id):
+    """Stop keeping a job's results current; they stay as last updated."""
+    with watchers_lock:
+        watcher = watchers.pop(job_id, None)
+    if watcher is None:
+        return jsonify({'error': 'Job is not being watched'}), 404
+    watcher.stop()
+    return jsonify(watcher.status())
+
+@app.route('/jobs/<job_id>/live')
+def get_job_live(job_id):
+    """A job's results as of now, including changes applied by its watcher."""
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    return jsonify(live_state(job))
+
+def live_events(job):
+    """Server-sent events with the totals and change counts after every applied batch."""
+    analyzer = job.analyzer
+    last_update = None
+    version = None
+    while True:
+        version = analyzer.wait_for_progress(version, timeout=PROGRESS_STREAM_KEEPALIVE)
+        with analyzer.live_lock:
+            live = dict(analyzer.stats['live']) if analyzer.stats['live'] else None
+            event = {
+                'total_files': analyzer.stats['total_files'],
+                'total_size': analyzer.stats['total_size'],
+                'file_types': analyzer.stats['file_types'].copy(),
+                'live': live
+            }
+        if last_update is None or (live and live['last_update'] != last_update):
+            last_update = live['last_update'] if live else 0
+            yield f"data: {json.dumps(event)}\n\n"
+        else:
+            yield ": keepalive\n\n"
+
+        with watchers_lock:
+            watcher = watchers.get(job.id)
+        if watcher is None or not watcher.running:
+            yield f"event: done\ndata: {json.dumps({'watching': False})}\n\n"
+            return
+        time.sleep(PROGRESS_STREAM_INTERVAL)
+
+@app.route('/jobs/<job_id>/live/stream')
+def stream_job_live(job_id):
+    """Stream a watched job's live totals as server-sent events."""
+    job, error = finished_job(job_id)
+    if error:
+        return error
+    return Response(
+        stream_with_context(live_events(job)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/metrics')
+def metrics():
+    """Scan instrumentation for every known job, in Prometheus text format."""
+    jobs = job_manager.all()
+    lines = ['# TYPE folder_analyzer_jobs gauge']
+    for status in ('queued', 'running', 'completed', 'failed', 'cancelled'):
+        count = sum(1 for job in jobs if job.status == status)
+        lines.append(f'folder_analyzer_jobs{{status="{status}"}} {count}')
+
+    from metrics import render_prometheus
+    body = '\n'.join(lines) + '\n' + render_prometheus(
+        [({'job_id': job.id, 'path': job.folder_path}, job.analyzer.metrics) for job in jobs]
+    )
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
 @app.route('/cancel', methods=['POST'])
 def cancel_analysis():
-    """Cancel the current analysis."""
-    global current_analyzer
-    if current_analyzer is not None:
-        current_analyzer = None
+    """Cancel the most recent analysis."""
+    job = job_manager.latest()
+    if job is not None and job_manager.cancel(job.id):
         return jsonify({'message': 'Analysis cancelled'})
     return jsonify({'message': 'No analysis in progress'}), 404
 